@@ -1,13 +1,222 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 
 API_URL = "http://localhost:8000/ask"
+TIMEOUT = 3
+WORKERS = 2
+CACHE_SIZE = 128
+CACHE_TTL = 300
+# После стольких неудач подряд сервер считается мёртвым на BREAKER_RESET секунд
+BREAKER_THRESHOLD = 3
+BREAKER_RESET = 10
 
-def ask_ai(question):
+
+class AIUnavailable(Exception):
+    pass
+
+
+def make_session(pool_size=WORKERS):
+    # Постоянные соединения: не открываем новое TCP-соединение на каждый вопрос
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _shared_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def _post(session, url, question, timeout):
     try:
-        response = requests.post(API_URL, json={"question": question}, timeout=3)
-        if response.status_code == 200:
-            return response.json().get("answer", "")
-        else:
-            return f"Ошибка: {response.status_code}"
+        response = session.post(url, json={"question": question}, timeout=timeout)
     except Exception as e:
-        return f"AI не отвечает: {e}"
+        raise AIUnavailable(f"AI не отвечает: {e}")
+    if response.status_code != 200:
+        raise AIUnavailable(f"Ошибка: {response.status_code}")
+    try:
+        data = response.json()
+    except ValueError:
+        raise AIUnavailable("Ошибка: сервер прислал не JSON")
+    if not isinstance(data, dict):
+        raise AIUnavailable("Ошибка: неожиданный ответ сервера")
+    return data.get("answer", "")
+
+
+def _resolve(future, answer):
+    # Future мог уже закрыть close() — тогда поздний ответ просто теряется
+    try:
+        future.set_result(answer)
+    except InvalidStateError:
+        pass
+
+
+def ask_ai(question):
+    try:
+        return _post(_shared_session(), API_URL, question, TIMEOUT)
+    except AIUnavailable as e:
+        return str(e)
+
+
+class AnswerCache:
+    # LRU с временем жизни записи
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = collections.OrderedDict()
+
+    def get(self, question):
+        entry = self._entries.get(question)
+        if entry is None:
+            return None
+        expires, answer = entry
+        if expires < self.clock():
+            del self._entries[question]
+            return None
+        self._entries.move_to_end(question)
+        return answer
+
+    def put(self, question, answer):
+        self._entries[question] = (self.clock() + self.ttl, answer)
+        self._entries.move_to_end(question)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+class CircuitBreaker:
+    # closed — запросы идут; open — сразу отказ, пока не пройдёт reset секунд;
+    # затем пропускается одна пробная попытка (half-open)
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset=BREAKER_RESET, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset = reset
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self._trial or self.clock() - self.opened_at >= self.reset:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self._trial or self.clock() - self.opened_at < self.reset:
+            return False
+        self._trial = True
+        return True
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = self.clock()
+
+
+class AsyncAIClient:
+    # Неблокирующий клиент для игрового цикла. ask() сразу возвращает Future:
+    # ответ из кэша, уже летящий запрос с тем же вопросом или новый запрос
+    # в фоновом пуле. Колбэки вызываются в poll() — в потоке игры, раз в кадр.
+    # Пока сервер лежит, вопросы отклоняются без сетевых запросов.
+    def __init__(self, url=API_URL, workers=WORKERS, timeout=TIMEOUT, cache=None, breaker=None,
+                 session=None):
+        self.url = url
+        self.timeout = timeout
+        self.cache = cache or AnswerCache()
+        self.breaker = breaker or CircuitBreaker()
+        self.session = session or make_session(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-client")
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._done = queue.SimpleQueue()
+
+    def ask(self, question, callback=None):
+        with self._lock:
+            future = self._in_flight.get(question)
+            if future is None:
+                future = self._start(question)
+        if callback is not None:
+            if future.done():
+                self._done.put((callback, future.result()))
+            else:
+                future.add_done_callback(lambda f: self._done.put((callback, f.result())))
+        return future
+
+    def _start(self, question):
+        # Вызывается под self._lock
+        future = Future()
+        answer = self.cache.get(question)
+        if answer is not None:
+            future.set_result(answer)
+            return future
+        if not self.breaker.allow():
+            future.set_result("AI не отвечает: сервер недоступен")
+            return future
+        self._in_flight[question] = future
+        self._executor.submit(self._run, question, future)
+        return future
+
+    def _run(self, question, future):
+        # Future закрывается при любом исходе, иначе вопрос навсегда застрянет в _in_flight
+        answer = None
+        message = "AI не отвечает: внутренняя ошибка"
+        try:
+            answer = _post(self.session, self.url, question, self.timeout)
+        except AIUnavailable as e:
+            message = str(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(question, None)
+                if answer is None:
+                    self.breaker.failure()
+                else:
+                    self.breaker.success()
+                    self.cache.put(question, answer)
+            _resolve(future, message if answer is None else answer)
+
+    def poll(self, limit=None):
+        # Вызывает колбэки готовых ответов; возвращает, сколько вызвано
+        handled = 0
+        while limit is None or handled < limit:
+            try:
+                callback, answer = self._done.get_nowait()
+            except queue.Empty:
+                break
+            callback(answer)
+            handled += 1
+        return handled
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        # Отменённые задачи уже не ответят — закрываем их Future сами
+        with self._lock:
+            pending = list(self._in_flight.values())
+            self._in_flight.clear()
+        for future in pending:
+            _resolve(future, "AI не отвечает: клиент закрыт")
+        self.session.close()
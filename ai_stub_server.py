@@ -0,0 +1,87 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Заглушка AI-сервера для проверки ai_client без настоящей модели:
+# отвечает на POST /ask эхом вопроса, умеет тормозить и падать
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        with server.lock:
+            server.requests += 1
+            number = server.requests
+        if server.delay:
+            time.sleep(server.delay)
+        if self.path != "/ask":
+            self._reply(404, {"error": "not found"})
+        elif server.fail_every and number % server.fail_every == 0:
+            self._reply(500, {"error": "stub failure"})
+        else:
+            question = json.loads(body or b"{}").get("question", "")
+            self._reply(200, {"answer": f"stub answer to: {question}"})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=8000, delay=0.0, fail_every=0, verbose=False):
+        super().__init__((host, port), StubHandler)
+        self.delay = delay
+        self.fail_every = fail_every
+        self.verbose = verbose
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/ask"
+
+    def start(self):
+        # Фоновый запуск для проверок из Python; port=0 — любой свободный порт
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub for the AI server used by ai_client")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each answer")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with HTTP 500")
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, delay=args.delay, fail_every=args.fail_every, verbose=True)
+    print(f"Stub AI server on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
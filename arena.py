@@ -0,0 +1,216 @@
+import pygame
+
+from navigation import FlowField
+from netcode import MAX_COORD
+from world import BULLET_VELOCITY, CHASE_MEMORY, ENEMY_SIZE, GOOSE_SIZE, NO_INPUT, World
+
+# Сколько шагов мёртвый гусь ждёт возрождения
+RESPAWN_TICKS = 180
+# Новые враги и возрождённые гуси не появляются ближе этого к чужим гусям / врагам, px
+SPAWN_CLEARANCE = 250
+SPAWN_ATTEMPTS = 50
+# У каждого гуся своё поле потоков — общее от многих целей пришлось бы пересчитывать
+# почти каждый шаг. Поле меньше, чем у World, цель обновляется раз в FLOW_EVERY шагов,
+# а пересчёт ленивый: только когда за этим гусем кто-то гонится
+ARENA_FLOW_RADIUS = 12
+FLOW_EVERY = 6
+
+
+class Player:
+    # Гусь игрока на арене: то же, что у World для единственного гуся
+    __slots__ = ("id", "rect", "health", "invulnerable", "fire_cooldown", "speed_boost", "facing",
+                 "inputs", "respawn", "kills", "deaths")
+
+    def __init__(self, pid):
+        self.id = pid
+        self.rect = pygame.Rect((0, 0), GOOSE_SIZE)
+        self.inputs = NO_INPUT
+        self.kills = 0
+        self.deaths = 0
+        self.respawn = 0
+
+    def spawn(self, x, y):
+        self.rect.topleft = (x, y)
+        self.health = 3
+        self.invulnerable = 60
+        self.fire_cooldown = 0
+        self.speed_boost = 0
+        self.facing = "right"
+        self.respawn = 0
+
+    @property
+    def alive(self):
+        return self.health > 0
+
+
+class Arena(World):
+    # Общий мир для сетевой игры (net_server.py): много гусей, у каждого свой ввод.
+    # Стены, враги, пули и бонусы — от World; враги гонятся за ближайшим гусем,
+    # убитые враги и гуси возрождаются, так что партия не кончается.
+    # Камера и дальние редкие обновления тут не нужны — обновляются все враги.
+    def __init__(self, level_index=1, seed=None, enemies=None, **kwargs):
+        super().__init__(level_index=level_index, seed=seed, **kwargs)
+        self.players = {}
+        self.flows = {}
+        self.next_player_id = 1
+        # Хозяин каждой пули (id(bullet) -> Player) для очков за попадания
+        self.owners = {}
+        # Сетевые номера сущностей: пулы переиспользуют объекты, поэтому номер
+        # выдаётся при каждом spawn, а не хранится в самом объекте
+        self.net_ids = {}
+        self.next_net_id = 1
+        if not self.load_level(level_index):
+            raise ValueError(f"level {level_index} not found")
+        if self.width > MAX_COORD or self.height > MAX_COORD:
+            # Координаты не влезут в снимок, и сервер упадёт на первой же рассылке
+            raise ValueError(f"level {level_index} is {self.width}x{self.height}, "
+                             f"the arena supports at most {MAX_COORD}x{MAX_COORD}")
+        self.enemy_target = len(self.enemies) if enemies is None else enemies
+
+    def _net_id(self, obj):
+        net_id = self.next_net_id
+        self.next_net_id += 1
+        self.net_ids[id(obj)] = net_id
+        return net_id
+
+    def add_enemy(self, x, y):
+        enemy = super().add_enemy(x, y)
+        self._net_id(enemy)
+        return enemy
+
+    def add_bullet(self, x, y, vx, vy):
+        bullet = super().add_bullet(x, y, vx, vy)
+        self._net_id(bullet)
+        return bullet
+
+    def add_player(self):
+        player = Player(self.next_player_id)
+        self.next_player_id += 1
+        self._net_id(player)
+        player.spawn(*self._free_spot(GOOSE_SIZE))
+        self.players[player.id] = player
+        self.flows[player.id] = FlowField(self.nav, ARENA_FLOW_RADIUS)
+        return player
+
+    def remove_player(self, pid):
+        player = self.players.pop(pid, None)
+        self.flows.pop(pid, None)
+        if player is not None:
+            self.net_ids.pop(id(player), None)
+
+    def set_inputs(self, pid, inputs):
+        player = self.players.get(pid)
+        if player is not None:
+            player.inputs = inputs
+
+    def _free_spot(self, size):
+        # Случайное место без стен подальше от врагов и гусей; если не нашлось — угол уровня
+        clearance = SPAWN_CLEARANCE * SPAWN_CLEARANCE
+        others = [e.rect for e in self.enemies] + [p.rect for p in self.players.values() if p.alive]
+        for _ in range(SPAWN_ATTEMPTS):
+            x = self.rng.randint(40, self.width - size[0] - 40)
+            y = self.rng.randint(40, self.height - size[1] - 40)
+            rect = pygame.Rect((x, y), size)
+            if self.wall_grid.collide_any(rect):
+                continue
+            if any((r.centerx - rect.centerx) ** 2 + (r.centery - rect.centery) ** 2 < clearance
+                   for r in others):
+                continue
+            return x, y
+        return 50, 50
+
+    def geese(self):
+        return [(p.rect, p.facing) for p in self.players.values() if p.alive]
+
+    def step(self, inputs=NO_INPUT, timer=None):
+        # inputs не используется: у каждого игрока свой, см. set_inputs
+        self.frame += 1
+        for player in self.players.values():
+            if not player.alive:
+                player.respawn -= 1
+                if player.respawn <= 0:
+                    player.spawn(*self._free_spot(GOOSE_SIZE))
+                continue
+            player.fire_cooldown += 1
+            if player.invulnerable > 0:
+                player.invulnerable -= 1
+            if player.speed_boost > 0:
+                player.speed_boost -= 1
+            player.facing = self.move_goose(player.rect, player.inputs, player.speed_boost, player.facing)
+            if player.inputs.fire:
+                self.shoot_player(player)
+        if timer is not None:
+            timer.mark("movement")
+        self.handle_bullets()
+        if timer is not None:
+            timer.mark("bullets")
+        self.update_enemies()
+        self.respawn_enemies()
+        if timer is not None:
+            timer.mark("enemies")
+        self.update_bonuses()
+        if timer is not None:
+            timer.mark("bonuses")
+
+    def shoot_player(self, player):
+        if player.fire_cooldown < 20:
+            return
+        vx, vy = BULLET_VELOCITY.get(player.facing, (10, 0))
+        bullet = self.add_bullet(player.rect.centerx, player.rect.centery, vx, vy)
+        self.owners[id(bullet)] = player
+        player.fire_cooldown = 0
+        self.shots += 1
+
+    def bullet_hit(self, bullet, enemy):
+        player = self.owners.get(id(bullet))
+        # Гусь мог уже выйти из игры
+        if player is not None and player.id in self.players:
+            player.kills += 1
+
+    def update_enemies(self):
+        alive = [p for p in self.players.values() if p.alive]
+        flows = self.flows
+        for player in alive:
+            if (player.id + self.frame) % FLOW_EVERY == 0:
+                flows[player.id].track(player.rect)
+        nav = self.nav
+        for enemy in self.enemies:
+            ex, ey = enemy.rect.center
+            target = min(alive, default=None,
+                         key=lambda p: (p.rect.centerx - ex) ** 2 + (p.rect.centery - ey) ** 2)
+            if target is None:
+                enemy.alert = 0
+            elif nav.can_see(enemy.rect, target.rect):
+                enemy.alert = CHASE_MEMORY
+            elif enemy.alert > 0:
+                enemy.alert -= 1
+            enemy.state = "chasing" if enemy.alert > 0 else "patrolling"
+            if target is None:
+                enemy.update()
+            else:
+                enemy.update(1, target.rect, flows[target.id])
+
+            for player in alive:
+                if player.invulnerable == 0 and enemy.rect.colliderect(player.rect):
+                    player.health -= 1
+                    player.invulnerable = 60
+                    self.damage_taken += 1
+                    if player.health <= 0:
+                        player.deaths += 1
+                        player.respawn = RESPAWN_TICKS
+
+    def respawn_enemies(self):
+        # Не больше одного врага за шаг, чтобы после общей зачистки они не появлялись толпой
+        if len(self.enemies) < self.enemy_target:
+            self.add_enemy(*self._free_spot(ENEMY_SIZE))
+
+    def update_bonuses(self):
+        bonuses = self.bonuses
+        for i in range(len(bonuses) - 1, -1, -1):
+            bonus = bonuses[i]
+            for player in self.players.values():
+                if player.alive and player.rect.colliderect(bonus.rect):
+                    self.apply_bonus(player, bonus.type)
+                    del bonuses[i]
+                    break
+        self.spawn_bonus()
@@ -0,0 +1,137 @@
+import os
+import threading
+
+import pygame
+
+from world import BULLET_SIZE, ENEMY_SIZE, GOOSE_SIZE
+
+# Спрайт: файл, размер на экране при scale=1 (как у хитбокса) и цвет заглушки,
+# которая рисуется, пока файлы ещё грузятся
+SPRITES = {
+    "goose": ("goose.png", GOOSE_SIZE, (255, 255, 0)),
+    "enemy": ("enemy_goose.png", ENEMY_SIZE, (255, 0, 0)),
+    "bullet": ("bullet.png", BULLET_SIZE, (0, 255, 0)),
+}
+SHOOT_SOUND = "shoot.wav"
+# Выстрелы идут по кругу по этим каналам и не ждут, пока доиграет предыдущий
+SHOT_CHANNELS = 4
+ATLAS_PADDING = 1
+# Исходные картинки смотрят вправо; влево — зеркально, чтобы гусь не вставал вверх ногами
+FACING_TRANSFORMS = {
+    "right": lambda s: s,
+    "left": lambda s: pygame.transform.flip(s, True, False),
+    "up": lambda s: pygame.transform.rotate(s, 90),
+    "down": lambda s: pygame.transform.rotate(s, -90),
+}
+
+
+class Assets:
+    # Файлы читаются в фоновом потоке, поэтому окно появляется сразу, а первые
+    # кадры рисуются заглушками. Когда всё прочитано, на главном потоке картинки
+    # один раз собираются в атлас и переводятся в формат дисплея (convert_alpha),
+    # а повёрнутые и масштабированные варианты кэшируются по (имя, facing, scale).
+    def __init__(self, base_dir="."):
+        self.base_dir = base_dir
+        self._images = {}
+        self._sound = None
+        self._loaded = threading.Event()
+        self._atlas = None
+        self._sprites = {}
+        self._variants = {}
+        self._placeholders = {}
+        self._channels = []
+        self._next_channel = 0
+        if _init_mixer():
+            pygame.mixer.set_reserved(SHOT_CHANNELS)
+            self._channels = [pygame.mixer.Channel(i) for i in range(SHOT_CHANNELS)]
+        threading.Thread(target=self._load, name="asset-loader", daemon=True).start()
+
+    def _path(self, name):
+        return os.path.join(self.base_dir, name)
+
+    def _load(self):
+        try:
+            for name, (filename, _, _) in SPRITES.items():
+                try:
+                    self._images[name] = pygame.image.load(self._path(filename))
+                except (pygame.error, FileNotFoundError) as e:
+                    print(f"Sprite {filename} not loaded: {e}")
+            if self._channels:
+                try:
+                    self._sound = pygame.mixer.Sound(self._path(SHOOT_SOUND))
+                except (pygame.error, FileNotFoundError) as e:
+                    print(f"Sound {SHOOT_SOUND} not loaded: {e}")
+        finally:
+            self._loaded.set()
+
+    def wait(self, timeout=None):
+        # Дождаться загрузки и собрать атлас сейчас (бенчмарки, скриншоты)
+        self._loaded.wait(timeout)
+        self._build_atlas()
+
+    def _build_atlas(self):
+        if self._atlas is not None or not self._loaded.is_set():
+            return
+        # Все картинки в один ряд на одной поверхности; спрайты — её подповерхности
+        images = [(name, self._images[name]) for name in SPRITES if name in self._images]
+        width = sum(img.get_width() + ATLAS_PADDING for _, img in images) or 1
+        height = max((img.get_height() for _, img in images), default=1)
+        atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+        x = 0
+        areas = {}
+        for name, img in images:
+            areas[name] = atlas.blit(img, (x, 0))
+            x += img.get_width() + ATLAS_PADDING
+        self._atlas = atlas.convert_alpha()
+        for name, area in areas.items():
+            sprite = self._atlas.subsurface(area)
+            size = SPRITES[name][1]
+            if sprite.get_size() != size:
+                sprite = pygame.transform.scale(sprite, size)
+            self._sprites[name] = sprite
+        self._variants.clear()
+
+    def _placeholder(self, name):
+        surface = self._placeholders.get(name)
+        if surface is None:
+            _, size, color = SPRITES[name]
+            surface = pygame.Surface(size).convert()
+            surface.fill(color)
+            self._placeholders[name] = surface
+        return surface
+
+    def sprite(self, name, facing="right", scale=1):
+        key = (name, facing, scale)
+        surface = self._variants.get(key)
+        if surface is not None:
+            return surface
+        self._build_atlas()
+        base = self._sprites.get(name)
+        if base is None:
+            # Файл ещё не прочитан (или не нашёлся) — заглушку не кэшируем
+            return self._placeholder(name)
+        # Преобразования сохраняют формат пикселей источника, повторный convert не нужен
+        surface = FACING_TRANSFORMS[facing](base)
+        if scale != 1:
+            w, h = surface.get_size()
+            surface = pygame.transform.scale(surface, (max(1, round(w * scale)), max(1, round(h * scale))))
+        self._variants[key] = surface
+        return surface
+
+    def play_shot(self):
+        if self._sound is None:
+            return
+        channel = self._channels[self._next_channel]
+        self._next_channel = (self._next_channel + 1) % len(self._channels)
+        channel.play(self._sound)
+
+
+def _init_mixer():
+    # Без звуковой карты (CI, безголовый режим) игра просто молчит
+    if pygame.mixer.get_init():
+        return True
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        return False
+    return True
@@ -0,0 +1,191 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import time
+
+import levels
+from levels import BONUS_TYPES, LevelCache
+from main import random_policy
+from perf import percentile
+from world import FPS, Inputs, World
+
+# Прогон тысяч партий без окна для балансировки уровней: каждая партия —
+# один уровень с одним ботом до победы, смерти или лимита шагов
+MAX_FRAMES = FPS * 120
+# Сколько шагов бот стоит на месте, прежде чем решит, что упёрся в стену
+STUCK_FRAMES = 20
+
+
+def circle_policy(world, rng, hold=45):
+    # Ходит по кругу и всё время стреляет; стартовая сторона случайная
+    script = [Inputs(right=True, fire=True), Inputs(down=True, fire=True),
+              Inputs(left=True, fire=True), Inputs(up=True, fire=True)]
+    frame = rng.randrange(len(script) * hold)
+    while True:
+        yield script[frame // hold % len(script)]
+        frame += 1
+
+
+def hunter_policy(world, rng):
+    # Выходит на одну линию с ближайшим врагом и стреляет в его сторону;
+    # упёршись в стену, какое-то время идёт в случайную сторону
+    goose = world.goose_rect
+    last_pos, still, detour = goose.topleft, 0, 0
+    detour_inputs = Inputs()
+    while True:
+        still = still + 1 if goose.topleft == last_pos else 0
+        last_pos = goose.topleft
+        if still >= STUCK_FRAMES:
+            detour = rng.randint(15, 45)
+            direction = rng.choice(["left", "right", "up", "down"])
+            detour_inputs = Inputs(fire=True, **{direction: True})
+            still = 0
+        if detour:
+            detour -= 1
+            yield detour_inputs
+            continue
+
+        gx, gy = goose.center
+        target = min(world.enemy_rects(), default=None,
+                     key=lambda r: (r.centerx - gx) ** 2 + (r.centery - gy) ** 2)
+        if target is None:
+            yield Inputs()
+            continue
+        dx, dy = target.centerx - gx, target.centery - gy
+        if abs(dy) < 15:
+            yield Inputs(fire=True, right=dx > 0, left=dx < 0)
+        elif abs(dx) < 15:
+            yield Inputs(fire=True, down=dy > 0, up=dy < 0)
+        elif abs(dx) < abs(dy):
+            yield Inputs(right=dx > 0, left=dx < 0)
+        else:
+            yield Inputs(down=dy > 0, up=dy < 0)
+
+
+POLICIES = {
+    "random": lambda world, rng: random_policy(rng),
+    "circle": circle_policy,
+    "hunter": hunter_policy,
+}
+
+
+def find_levels(levels_dir):
+    found = []
+    for path in glob.glob(os.path.join(levels_dir, "level*.json")):
+        match = re.fullmatch(r"level(\d+)\.json", os.path.basename(path))
+        if match:
+            found.append(int(match.group(1)))
+    return sorted(found)
+
+
+def init_worker(levels_dir):
+    # Свой кэш уровней в каждом процессе: уровень разбирается один раз на процесс
+    levels.cache = LevelCache(levels_dir)
+
+
+def run_episode(task):
+    # Партия целиком определяется сидом: от него и мир, и отдельный генератор бота,
+    # поэтому результат не зависит от числа процессов и порядка задач
+    level_index, policy, seed, max_frames = task
+    world = World(level_index=level_index, seed=seed)
+    world.load_level(level_index)
+    inputs = POLICIES[policy](world, random.Random(seed ^ 0x5EED))
+    frames = 0
+    while frames < max_frames and not world.game_over and not world.level_completed:
+        world.step(next(inputs))
+        frames += 1
+    outcome = "win" if world.level_completed else "loss" if world.game_over else "timeout"
+    return {"level": level_index, "policy": policy, "seed": seed, "outcome": outcome,
+            "frames": frames, "damage": world.damage_taken, "kills": world.kills, "shots": world.shots,
+            "bonuses": dict(world.bonuses_taken)}
+
+
+def summarize(results):
+    groups = {}
+    for r in results:
+        groups.setdefault((r["level"], r["policy"]), []).append(r)
+    report = []
+    for (level_index, policy), runs in sorted(groups.items()):
+        n = len(runs)
+        clear_s = sorted(r["frames"] / FPS for r in runs if r["outcome"] == "win")
+        shots = sum(r["shots"] for r in runs)
+        report.append({
+            "level": level_index, "policy": policy, "episodes": n,
+            "win_rate": len(clear_s) / n,
+            "loss_rate": sum(r["outcome"] == "loss" for r in runs) / n,
+            "timeout_rate": sum(r["outcome"] == "timeout" for r in runs) / n,
+            "clear_s_mean": statistics.fmean(clear_s) if clear_s else None,
+            "clear_s_p50": statistics.median(clear_s) if clear_s else None,
+            "clear_s_p90": percentile(clear_s, 90) if clear_s else None,
+            "damage_mean": statistics.fmean(r["damage"] for r in runs),
+            "kills_mean": statistics.fmean(r["kills"] for r in runs),
+            "accuracy": sum(r["kills"] for r in runs) / shots if shots else None,
+            "bonuses_per_episode": {btype: sum(r["bonuses"][btype] for r in runs) / n
+                                    for btype in BONUS_TYPES},
+        })
+    return report
+
+
+def print_report(report):
+    def fmt(value, width, spec):
+        return f"{'-':>{width}}" if value is None else format(value, f"{width}{spec}")
+
+    print(f"{'level':>5} {'policy':<8} {'runs':>6} {'win':>6} {'loss':>6} {'timeout':>7} "
+          f"{'clear p50 s':>11} {'p90 s':>7} {'damage':>7} {'kills':>6} {'acc':>5}  bonuses/run")
+    for row in report:
+        bonuses = " ".join(f"{k} {v:.2f}" for k, v in row["bonuses_per_episode"].items())
+        print(f"{row['level']:>5} {row['policy']:<8} {row['episodes']:>6} {row['win_rate']:>6.1%} "
+              f"{row['loss_rate']:>6.1%} {row['timeout_rate']:>7.1%} {fmt(row['clear_s_p50'], 11, '.1f')} "
+              f"{fmt(row['clear_s_p90'], 7, '.1f')} {row['damage_mean']:>7.2f} {row['kills_mean']:>6.2f} "
+              f"{fmt(row['accuracy'], 5, '.2f')}  {bonuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless GooseTanks episodes in parallel")
+    parser.add_argument("--levels", type=int, nargs="+", help="level numbers (default: every levels/levelN.json)")
+    parser.add_argument("--levels-dir", default=levels.LEVELS_DIR)
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=["random", "hunter"])
+    parser.add_argument("--episodes", type=int, default=1000, help="episodes per level and policy")
+    parser.add_argument("--max-frames", type=int, default=MAX_FRAMES, help="step limit per episode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--out", metavar="PATH", help="write the report as JSON")
+    args = parser.parse_args()
+
+    level_indexes = args.levels or find_levels(args.levels_dir)
+    if not level_indexes:
+        parser.error(f"no level*.json files in {args.levels_dir}")
+    # Сиды партий раздаются заранее из одного генератора — прогон воспроизводим целиком
+    master = random.Random(args.seed)
+    tasks = [(level_index, policy, master.randrange(1 << 63), args.max_frames)
+             for level_index in level_indexes for policy in args.policies for _ in range(args.episodes)]
+    # Крупные порции, чтобы накладные расходы пула не съедали выигрыш от процессов
+    chunksize = max(1, len(tasks) // (args.processes * 8))
+
+    start = time.perf_counter()
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes, init_worker, (args.levels_dir,)) as pool:
+            results = list(pool.imap_unordered(run_episode, tasks, chunksize))
+    else:
+        init_worker(args.levels_dir)
+        results = [run_episode(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+
+    steps = sum(r["frames"] for r in results)
+    print(f"{len(results)} episodes, {steps} steps in {elapsed:.1f}s on {args.processes} processes "
+          f"({len(results) / elapsed:.0f} episodes/s, {steps / elapsed:.0f} steps/s)")
+    report = summarize(results)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"seed": args.seed, "args": vars(args), "levels": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
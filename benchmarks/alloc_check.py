@@ -0,0 +1,178 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+from world import CHASE_MEMORY, Inputs, World
+
+# Гусь ходит по кругу и стреляет без остановки: пули всё время появляются и исчезают
+SCRIPT = [Inputs(right=True, fire=True), Inputs(down=True, fire=True),
+          Inputs(left=True, fire=True), Inputs(up=True, fire=True)]
+SCRIPT_HOLD = 45
+# Раз в столько шагов один враг погибает и на его место встаёт новый из пула
+RESPAWN_EVERY = 25
+# Потолок памяти, временно занятой за один кадр. Совсем без выделений шаг не обходится:
+# координаты больше 256, номер кадра и т. п. — новые int, но они освобождаются в том же
+# кадре. Словарь или список на каждый запрос к сетке, очередь BFS и т. п. его превышают
+FRAME_PEAK_LIMIT = 1024
+GAME_FILES = ("world.py", "pool.py", "spatial.py", "navigation.py")
+# Допуск на итог по памяти: пара int-полей (цель поля потоков, граница патруля) могла
+# смениться с кэшированного малого int на новый объект — это состояние, а не рост
+RETAINED_SLACK = 64
+
+
+def spawn_spots(world):
+    # Новые враги встают туда, где стояли враги уровня, — там точно нет стен
+    return [tuple(enemy.rect.topleft) for enemy in world.enemies]
+
+
+def touch_all_cells(world):
+    # Список ячейки сетки врагов создаётся при первом заходе в неё и остаётся навсегда.
+    # Заводим все ячейки заранее, чтобы первый заход погони в новый угол карты
+    # не считался ростом памяти
+    probe = object()
+    world.enemy_grid.insert(probe, world.area)
+    world.enemy_grid.remove(probe)
+
+
+def grid_free_snapshot(world):
+    # Сколько памяти держат списки ячеек, зависит от того, на скольких ячейках сейчас
+    # стоят враги. Чтобы два снимка были сравнимы, враги на время снимка убираются из сетки.
+    # Полная сборка мусора очищает списки свободных кортежей и т. п.: освобождённые
+    # кортежи лежат там и для tracemalloc выглядят живыми
+    enemies = list(world.enemies)
+    for enemy in enemies:
+        world.enemy_grid.remove(enemy)
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    for enemy in enemies:
+        world.enemy_grid.insert(enemy, enemy.rect)
+    return snapshot
+
+
+def kill_and_respawn(world, spots, n):
+    # Как смерть от пули в handle_bullets: убрать из сетки, пометить, remove_dead —
+    # и сразу новый враг через add_enemy, то есть из свободных объектов пула
+    enemy = world.enemies.items[n % len(world.enemies)]
+    world.enemy_grid.remove(enemy)
+    enemy.dead = True
+    world.enemies.remove_dead()
+    world.add_enemy(*spots[n % len(spots)])
+
+
+def play(world, spots, start, frames, frame_peaks=None):
+    # frame_peaks — если задан, сюда пишется пик временной памяти каждого кадра
+    enemies = world.enemies
+    for frame in range(start, start + frames):
+        # Скорострельность как под бонусом: выстрел каждый кадр
+        world.fire_cooldown = 20
+        # Враги всё время гонятся за гусем: работают поле потоков, погоня вдоль
+        # стен и запросы к сетке, задевающие несколько ячеек
+        for i in range(len(enemies)):
+            enemies.items[i].alert = CHASE_MEMORY
+        inputs = SCRIPT[frame // SCRIPT_HOLD % len(SCRIPT)]
+        if frame_peaks is None:
+            world.step(inputs)
+        else:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            world.step(inputs)
+            frame_peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        # Убитых пулями заменяем новыми, чтобы число врагов не падало
+        while len(enemies) < len(spots):
+            world.add_enemy(*spots[(frame + len(enemies)) % len(spots)])
+        if frame % RESPAWN_EVERY == 0:
+            kill_and_respawn(world, spots, frame // RESPAWN_EVERY)
+
+
+def main():
+    # Проверка установившегося режима: после разогрева (пулы набрали объекты)
+    # кадры не должны создавать пуль, врагов и их rect, хотя и те, и другие
+    # всё время гибнут и появляются, а враги гонятся за гусем. tracemalloc помнит,
+    # где выделен каждый объект, — ни один живой объект не должен быть новым,
+    # выделенным внутри замеряемого окна, память, выделенная кодом игры, не должна
+    # вырасти, а временная память кадра — превысить FRAME_PEAK_LIMIT.
+    parser = argparse.ArgumentParser(description="Check that steady-state World.step allocates no entities")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=600)
+    parser.add_argument("--frames", type=int, default=1000)
+    args = parser.parse_args()
+
+    world = World(seed=args.seed)
+    if not world.load_level(args.level):
+        sys.exit(1)
+    # Бессмертный гусь и враги, которые всё время возвращаются: прогон не обрывается
+    # game over / победой
+    world.health = 1 << 30
+    # Трассировка с самого разогрева: иначе освобождение объектов, созданных до
+    # неё, не попадает в разницу снимков и итог по памяти не сходится
+    tracemalloc.start(5)
+    spots = spawn_spots(world)
+    for n in range(len(spots)):
+        kill_and_respawn(world, spots, n)
+    play(world, spots, 0, args.warmup)
+    touch_all_cells(world)
+
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+
+    gc.collect()
+    pooled = len(world.bullets.items), len(world.enemies.items)
+    warm = {id(thing) for pool in (world.bullets, world.enemies) for obj in pool.items for thing in (obj, obj.rect)}
+    before = grid_free_snapshot(world)
+    gc.callbacks.append(on_gc)
+    frame_peaks = []
+    start_size, _ = tracemalloc.get_traced_memory()
+    play(world, spots, args.warmup, args.frames, frame_peaks)
+    end_size, _ = tracemalloc.get_traced_memory()
+    gc.callbacks.remove(on_gc)
+    after = grid_free_snapshot(world)
+
+    fresh = []
+    for pool in (world.bullets, world.enemies):
+        for obj in pool.items:
+            for thing in (obj, obj.rect):
+                traceback = tracemalloc.get_object_traceback(thing)
+                if id(thing) not in warm and traceback is not None:
+                    fresh.append((type(thing).__name__, traceback))
+    tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(True, os.path.join("*", name)) for name in GAME_FILES]
+    # Итог по всем строкам вместе: новое число на месте старого (frame, shots) —
+    # это освобождение в одной строке и выделение в другой, а не рост
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    retained = sum(stat.size_diff for stat in diff)
+    grown = [stat for stat in diff if stat.size_diff > 0]
+    print(f"{args.frames} frames, pools {pooled[0]} bullets / {pooled[1]} enemies, "
+          f"now {world.bullet_count} bullets in flight, {args.frames // RESPAWN_EVERY} enemies respawned")
+    print(f"  traced: {end_size - start_size:+d} B retained, game code {retained:+d} B, "
+          f"frame peak {max(frame_peaks)} B (median {sorted(frame_peaks)[len(frame_peaks) // 2]} B), "
+          f"gc collections: {collections[0]}")
+    failed = False
+    if max(frame_peaks) > FRAME_PEAK_LIMIT:
+        worst = frame_peaks.index(max(frame_peaks))
+        print(f"Frame {args.warmup + worst} allocated {frame_peaks[worst]} B of temporary memory "
+              f"(limit {FRAME_PEAK_LIMIT} B)")
+        failed = True
+    if retained > RETAINED_SLACK:
+        print("Memory allocated by game code grew during steady-state frames:")
+        for stat in grown[:5]:
+            print(f"  {stat}")
+        failed = True
+    if fresh or (len(world.bullets.items), len(world.enemies.items)) != pooled:
+        print("Entities allocated during steady-state frames:")
+        for name, traceback in fresh[:10]:
+            print(f"  {name} at {traceback[-1]}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
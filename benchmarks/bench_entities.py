@@ -0,0 +1,80 @@
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+
+import pygame
+
+from swarm import SwarmWorld
+from world import World
+
+SIZES = [10, 100, 1000, 10000]
+
+
+def build_world(world_cls, n, seed):
+    # n врагов и n пуль на карте, площадь которой растёт вместе с n
+    rng = random.Random(seed)
+    size = max(800, int(math.sqrt(n) * 120))
+    world = world_cls(size, size, seed=seed)
+    walls = [pygame.Rect(0, 0, size, 20), pygame.Rect(0, size - 20, size, 20),
+             pygame.Rect(0, 0, 20, size), pygame.Rect(size - 20, 0, 20, size)]
+    for _ in range(max(4, n // 50)):
+        if rng.random() < 0.5:
+            walls.append(pygame.Rect(rng.randint(40, size - 240), rng.randint(40, size - 60), 200, 20))
+        else:
+            walls.append(pygame.Rect(rng.randint(40, size - 60), rng.randint(40, size - 240), 20, 200))
+    world.set_walls(walls)
+    world.goose_rect.center = (size // 2, size // 2)
+    for _ in range(n):
+        world.add_enemy(rng.randint(40, size - 80), rng.randint(40, size - 80))
+    for _ in range(n):
+        vx, vy = rng.choice([(10, 0), (-10, 0), (0, 10), (0, -10)])
+        world.add_bullet(rng.randint(40, size - 40), rng.randint(40, size - 40), vx, vy)
+    return world
+
+
+def time_steps(world_cls, n, seed, steps):
+    world = build_world(world_cls, n, seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        world.handle_bullets()
+        world.update_enemies()
+    elapsed = (time.perf_counter() - start) / steps
+    return elapsed * 1000, world.enemy_count, world.state_hash().hex()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-object entities vs the numpy entity store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        row = {"entities": n}
+        for name, world_cls in (("objects", World), ("numpy", SwarmWorld)):
+            runs = [time_steps(world_cls, n, args.seed + r, args.steps) for r in range(args.repeat)]
+            row[name + "_ms"] = statistics.median(ms for ms, _, _ in runs)
+            row[name + "_left"] = runs[0][1]
+            row[name + "_hashes"] = [h for _, _, h in runs]
+        # Оба пути должны давать одинаковый результат: позиции, состояния и порядок, а не только число
+        row["match"] = row["objects_hashes"] == row["numpy_hashes"]
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'entities':>9} {'objects ms':>11} {'numpy ms':>9} {'speedup':>8}  match")
+    for row in results:
+        speedup = row["objects_ms"] / row["numpy_ms"]
+        print(f"{row['entities']:>9} {row['objects_ms']:>11.3f} {row['numpy_ms']:>9.3f} "
+              f"{speedup:>7.1f}x  {row['match']}")
+
+
+if __name__ == "__main__":
+    main()
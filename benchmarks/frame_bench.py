@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pygame
+
+import main as game
+from levels import LevelCache
+from perf import StageTimer, percentile
+from world import Inputs, World
+
+STAGES = ["movement", "bullets", "enemies", "bonuses", "draw"]
+# Гусь ходит по кругу и всё время стреляет — одинаковая нагрузка для всех сценариев
+SCRIPT = [Inputs(right=True, fire=True), Inputs(down=True, fire=True),
+          Inputs(left=True, fire=True), Inputs(up=True, fire=True)]
+SCRIPT_HOLD = 45
+
+
+def generate_level(width, height, n_walls, n_enemies, seed):
+    # Случайная карта в формате levels/levelN.json: рамка, отрезки стен и враги не в стенах
+    rng = random.Random(seed)
+    walls = [[0, 0, width, 20], [0, height - 20, width, 20],
+             [0, 0, 20, height], [width - 20, 0, 20, height]]
+    for _ in range(n_walls):
+        length = rng.randrange(60, 300, 20)
+        if rng.random() < 0.5:
+            walls.append([rng.randrange(40, width - length - 40, 20), rng.randrange(140, height - 60, 20),
+                          length, 20])
+        else:
+            walls.append([rng.randrange(140, width - 60, 20), rng.randrange(40, height - length - 40, 20),
+                          20, length])
+    enemies = []
+    while len(enemies) < n_enemies:
+        x, y = rng.randrange(60, width - 100, 20), rng.randrange(140, height - 100, 20)
+        if not any(wx < x + 40 and x < wx + ww and wy < y + 40 and y < wy + wh
+                   for wx, wy, ww, wh in walls):
+            enemies.append([x, y])
+    return {"size": [width, height], "walls": walls, "enemies": enemies, "bonuses": [[100, 100, "speed"]]}
+
+
+def populate(world, rng, enemies=0, bullets=0, chasing=False):
+    # Хук перед каждым кадром: держит число врагов и пуль постоянным,
+    # чтобы нагрузка не падала по мере того, как гусь всех отстреливает
+    def refill():
+        while world.enemy_count < enemies:
+            x, y = rng.randrange(60, world.width - 100), rng.randrange(140, world.height - 100)
+            if not world.wall_grid.collide_any(pygame.Rect(x, y, 40, 40)):
+                world.add_enemy(x, y)
+        for _ in range(bullets - world.bullet_count):
+            vx, vy = rng.choice([(10, 0), (-10, 0), (0, 10), (0, -10)])
+            world.add_bullet(rng.randint(40, world.width - 40), rng.randint(40, world.height - 40), vx, vy)
+        if chasing:
+            # Все враги в погоне и не забывают гуся до конца прогона
+            if hasattr(world, "enemy_arrays"):
+                world.enemy_arrays["alert"][:] = 1 << 30
+            for enemy in world.enemies:
+                enemy.alert = 1 << 30
+        world.level_completed = False
+    return refill
+
+
+def setup_chase(world_cls, args, levels_dir):
+    world = make_world(world_cls, generate_level(1600, 1200, 10, args.enemies, args.seed), levels_dir, args.seed)
+    return world, populate(world, random.Random(args.seed), enemies=args.enemies, chasing=True)
+
+
+def setup_bullets(world_cls, args, levels_dir):
+    world = make_world(world_cls, generate_level(1600, 1200, 10, 10, args.seed), levels_dir, args.seed)
+    return world, populate(world, random.Random(args.seed), enemies=10, bullets=args.bullets)
+
+
+def setup_large_map(world_cls, args, levels_dir):
+    world = make_world(world_cls, generate_level(4000, 3000, args.walls, 60, args.seed), levels_dir, args.seed)
+    return world, populate(world, random.Random(args.seed), enemies=60)
+
+
+SCENARIOS = {"chase": setup_chase, "bullets": setup_bullets, "large_map": setup_large_map}
+
+
+def make_world(world_cls, level, levels_dir, seed):
+    # Мир размера из level["size"], камера — размером с окно бенчмарка
+    with open(os.path.join(levels_dir, "level1.json"), "w") as f:
+        json.dump(level, f)
+    world = world_cls(game.WIDTH, game.HEIGHT, seed=seed)
+    world.level_cache = LevelCache(levels_dir)
+    world.load_level(1)
+    world.goose_rect.topleft = (60, 60)
+    # Бессмертный гусь: сценарий не должен обрываться на game over
+    world.health = 1 << 30
+    return world
+
+
+def run_frames(world, refill, frames, timer=None):
+    for frame in range(frames):
+        refill()
+        inputs = SCRIPT[frame // SCRIPT_HOLD % len(SCRIPT)]
+        if timer is not None:
+            timer.begin()
+        world.step(inputs, timer)
+        game.draw_window(world)
+        if timer is not None:
+            timer.mark("draw")
+            yield timer.stages
+        else:
+            yield None
+
+
+def bench_scenario(name, world_cls, args):
+    with tempfile.TemporaryDirectory() as levels_dir:
+        world, refill = SCENARIOS[name](world_cls, args, levels_dir)
+        for _ in run_frames(world, refill, args.warmup):
+            pass
+
+        timer = StageTimer()
+        samples = {stage: [] for stage in STAGES + ["frame"]}
+        for stages in run_frames(world, refill, args.frames, timer):
+            for stage in STAGES:
+                samples[stage].append(stages.get(stage, 0.0) * 1000)
+            samples["frame"].append(sum(stages.values()) * 1000)
+
+        # Отдельный прогон под tracemalloc: он сам замедляет код и портит тайминги
+        peaks, nets, blocks = [], [], []
+        tracemalloc.start()
+        for _ in run_frames(world, refill, args.alloc_frames):
+            pass
+        frames = run_frames(world, refill, args.alloc_frames)
+        for _ in range(args.alloc_frames):
+            before, _ = tracemalloc.get_traced_memory()
+            blocks_before = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+            next(frames)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            nets.append(after - before)
+            blocks.append(sys.getallocatedblocks() - blocks_before)
+        tracemalloc.stop()
+
+    result = {"entities": {"enemies": world.enemy_count, "bullets": world.bullet_count,
+                           "walls": len(world.walls)},
+              "stages": {}}
+    for stage, values in samples.items():
+        result["stages"][stage] = {"mean_ms": sum(values) / len(values),
+                                   "p50_ms": percentile(values, 50),
+                                   "p99_ms": percentile(values, 99)}
+    result["alloc"] = {"peak_bytes_p50": percentile(peaks, 50), "peak_bytes_p99": percentile(peaks, 99),
+                       "net_bytes_mean": sum(nets) / len(nets), "net_blocks_mean": sum(blocks) / len(blocks)}
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    for name, result in report["scenarios"].items():
+        entities = ", ".join(f"{k} {v}" for k, v in result["entities"].items())
+        print(f"\n{name} ({entities})")
+        print(f"  {'stage':<10} {'p50 ms':>8} {'p99 ms':>8}")
+        base = baseline["scenarios"].get(name) if baseline else None
+        for stage, stats in result["stages"].items():
+            line = f"  {stage:<10} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}"
+            if base is not None and stage in base["stages"]:
+                old = base["stages"][stage]["p50_ms"]
+                if old > 0:
+                    line += f"  ({(stats['p50_ms'] - old) / old * 100:+.0f}% p50 vs {baseline['commit']})"
+            print(line)
+        alloc = result["alloc"]
+        print(f"  alloc/frame: peak p50 {alloc['peak_bytes_p50']} B, p99 {alloc['peak_bytes_p99']} B, "
+              f"net {alloc['net_bytes_mean']:.0f} B, {alloc['net_blocks_mean']:.1f} blocks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage frame time benchmark (SDL dummy video driver)")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--alloc-frames", type=int, default=120)
+    parser.add_argument("--enemies", type=int, default=100, help="enemies in the chase scenario")
+    parser.add_argument("--bullets", type=int, default=500, help="bullets in flight in the bullets scenario")
+    parser.add_argument("--walls", type=int, default=400, help="walls in the large_map scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--swarm", action="store_true", help="benchmark the numpy SwarmWorld")
+    parser.add_argument("--out", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="show p50 change against an earlier --out file")
+    args = parser.parse_args()
+
+    world_cls = World
+    if args.swarm:
+        from swarm import SwarmWorld
+        world_cls = SwarmWorld
+    game.init_display(headless=True)
+    game.assets.wait()
+
+    report = {"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(), "world": world_cls.__name__,
+              "args": vars(args), "scenarios": {}}
+    for name in args.scenarios:
+        report["scenarios"][name] = bench_scenario(name, world_cls, args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import levels
+from arena import Arena
+from benchmarks.frame_bench import generate_level
+from levels import LevelCache
+from net_server import SNAPSHOT_EVERY, start_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Сколько ждать, пока все боты подключатся, и сколько дать им поиграть до замера
+JOIN_TIMEOUT = 15.0
+WARMUP = 1.0
+
+
+async def measure(players, args):
+    # Сервер — в этом процессе, боты — отдельным процессом (net_client.py --bots),
+    # чтобы их работа не попадала во время тика сервера
+    arena = Arena(level_index=1, seed=args.seed, enemies=args.enemies)
+    transport, server = await start_server(arena, port=0, snapshot_every=args.snapshot_every,
+                                           delta=not args.no_delta, verbose=False)
+    port = transport.get_extra_info("sockname")[1]
+    runner = asyncio.get_running_loop().create_task(server.run())
+    bots = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(ROOT, "net_client.py"), "--port", str(port), "--bots", str(players),
+        "--seconds", str(JOIN_TIMEOUT + WARMUP + args.seconds), "--seed", str(args.seed),
+        stdout=subprocess.DEVNULL, cwd=ROOT)
+    try:
+        for _ in range(int(JOIN_TIMEOUT * 10)):
+            if len(server.clients) == players:
+                break
+            await asyncio.sleep(0.1)
+        else:
+            raise RuntimeError(f"only {len(server.clients)} of {players} bots connected")
+        await asyncio.sleep(WARMUP)
+        server.reset_stats()
+        await asyncio.sleep(args.seconds)
+        return server.stats()
+    finally:
+        bots.kill()
+        await bots.wait()
+        server.stop()
+        await runner
+        transport.close()
+
+
+def print_report(rows):
+    print(f"{'players':>7} {'tick ms':>8} {'p99 ms':>7} {'ticks/s':>7} {'late':>5} "
+          f"{'KB/s out':>9} {'B/s in':>7} {'B/snapshot':>10} {'full':>5}")
+    for r in rows:
+        print(f"{r['players']:>7} {r['tick_ms_mean']:>8.2f} {r['tick_ms_p99']:>7.2f} {r['tick_rate']:>7.1f} "
+              f"{r['late_ticks']:>5} {r['out_bytes_per_s'] / 1024:>9.2f} {r['in_bytes_per_s']:>7.0f} "
+              f"{r['snapshot_bytes']:>10.1f} {r['full_snapshots']:>5}")
+
+
+def main():
+    # Нагрузочный тест сервера арены на localhost: для каждого числа игроков —
+    # время тика сервера и трафик на одного клиента (исходящий — снимки, входящий — ввод)
+    parser = argparse.ArgumentParser(description="Load-test the arena server with simulated clients")
+    parser.add_argument("--players", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--seconds", type=float, default=5.0, help="measured time per player count")
+    parser.add_argument("--size", type=int, nargs=2, default=[3000, 2000], metavar=("W", "H"),
+                        help="generated arena size")
+    parser.add_argument("--walls", type=int, default=60)
+    parser.add_argument("--enemies", type=int, default=60, help="enemies kept alive in the arena")
+    parser.add_argument("--snapshot-every", type=int, default=SNAPSHOT_EVERY)
+    parser.add_argument("--no-delta", action="store_true", help="send full snapshots (to compare traffic)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as levels_dir:
+        # Ботам стены не нужны (они не рисуют), уровень нужен только серверу
+        with open(os.path.join(levels_dir, "level1.json"), "w") as f:
+            json.dump(generate_level(*args.size, args.walls, args.enemies, args.seed), f)
+        levels.cache = LevelCache(levels_dir)
+        rows = [asyncio.run(measure(players, args)) for players in args.players]
+
+    print_report(rows)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import collections
+import glob
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+
+import pygame
+
+from navigation import NAV_CELL, NavGrid
+
+LEVELS_DIR = "levels"
+BONUS_TYPES = ["health", "shield", "speed"]
+DEFAULT_SIZE = (800, 600)
+
+# Скомпилированный уровень (.gtl): заголовок, затем int32-массивы стен (x, y, w, h),
+# врагов (x, y), бонусов (x, y, тип) и байтовые сетки blocked и walkable из NavGrid
+MAGIC = b"GTLV"
+VERSION = 1
+HEADER = struct.Struct("<4sHHiiiiiii")
+CACHE_SIZE = 8
+
+
+class LevelError(Exception):
+    pass
+
+
+class LevelData:
+    def __init__(self, walls, enemies, bonuses, width, height, nav=None, source=None):
+        self.walls = walls
+        self.enemies = enemies
+        self.bonuses = bonuses
+        self.width = width
+        self.height = height
+        self.nav = nav
+        self._source = source
+
+    def nav_grid(self, width, height):
+        # Готовая сетка годится, только если мир того же размера, что и при компиляции
+        if self.nav is None or (width, height) != (self.width, self.height):
+            return None
+        return self.nav
+
+
+def level_path(idx, levels_dir=LEVELS_DIR):
+    return os.path.join(levels_dir, f"level{idx}.json")
+
+
+def compiled_path(json_path):
+    return os.path.splitext(json_path)[0] + ".gtl"
+
+
+def parse_json(path):
+    with open(path) as f:
+        data = json.load(f)
+    walls = [tuple(w) for w in data.get("walls", [])]
+    enemies = [tuple(e) for e in data.get("enemies", [])]
+    bonuses = [(bx, by, BONUS_TYPES.index(btype)) for bx, by, btype in data.get("bonuses", [])]
+    # Размер мира: "size": [w, h]; без него — по крайним стенам
+    if "size" in data:
+        width, height = data["size"]
+    elif walls:
+        width = max(x + w for x, y, w, h in walls)
+        height = max(y + h for x, y, w, h in walls)
+    else:
+        width, height = DEFAULT_SIZE
+    return walls, enemies, bonuses, width, height
+
+
+def compile_level(json_path, out_path=None):
+    walls, enemies, bonuses, width, height = parse_json(json_path)
+    nav = NavGrid([pygame.Rect(w) for w in walls], width, height)
+    header = HEADER.pack(MAGIC, VERSION, nav.cell, width, height, len(walls), len(enemies),
+                         len(bonuses), nav.cols, nav.rows)
+    out_path = out_path or compiled_path(json_path)
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for row in walls + enemies + bonuses:
+            f.write(struct.pack(f"<{len(row)}i", *row))
+        f.write(nav.blocked)
+        f.write(nav.walkable)
+    # Атомарная замена: уже открытые через mmap старые версии остаются целыми
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def read_compiled(path):
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise LevelError(f"{path}: truncated header")
+    magic, version, cell, width, height, n_walls, n_enemies, n_bonuses, cols, rows = \
+        HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION or cell != NAV_CELL:
+        raise LevelError(f"{path}: unsupported format")
+    offset = HEADER.size
+    ints = n_walls * 4 + n_enemies * 2 + n_bonuses * 3
+    if len(view) != offset + ints * 4 + cols * rows * 2:
+        raise LevelError(f"{path}: size mismatch")
+    values = struct.unpack_from(f"<{ints}i", view, offset)
+    offset += ints * 4
+    grid = view[offset:offset + cols * rows * 2]
+
+    walls = [tuple(values[i:i + 4]) for i in range(0, n_walls * 4, 4)]
+    pos = n_walls * 4
+    enemies = [tuple(values[i:i + 2]) for i in range(pos, pos + n_enemies * 2, 2)]
+    pos += n_enemies * 2
+    bonuses = [tuple(values[i:i + 3]) for i in range(pos, pos + n_bonuses * 3, 3)]
+    nav = NavGrid.from_cells(cell, cols, rows, grid[:cols * rows], grid[cols * rows:])
+    return LevelData(walls, enemies, bonuses, width, height, nav, source=data)
+
+
+def read_level(json_path, mtime):
+    # Берём .gtl, если он не старше JSON; иначе компилируем заново.
+    # Если папка только для чтения — просто разбираем JSON.
+    bin_path = compiled_path(json_path)
+    try:
+        if os.stat(bin_path).st_mtime >= mtime:
+            return read_compiled(bin_path)
+    except (OSError, ValueError, struct.error, LevelError):
+        pass
+    try:
+        return read_compiled(compile_level(json_path, bin_path))
+    except OSError:
+        walls, enemies, bonuses, width, height = parse_json(json_path)
+        return LevelData(walls, enemies, bonuses, width, height)
+
+
+class LevelCache:
+    # LRU разобранных уровней; запись устаревает, когда меняется mtime JSON.
+    # prefetch() грузит уровень в фоновом потоке, чтобы переход на него был мгновенным.
+    def __init__(self, levels_dir=LEVELS_DIR, size=CACHE_SIZE):
+        self.levels_dir = levels_dir
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = None
+
+    def get(self, idx):
+        path = level_path(idx, self.levels_dir)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(path)
+                return entry[1]
+        level = read_level(path, mtime)
+        with self._lock:
+            self._entries[path] = (mtime, level)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return level
+
+    def prefetch(self, idx):
+        if self._queue is None:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._worker, name="level-prefetch", daemon=True).start()
+        self._queue.put(idx)
+
+    def _worker(self):
+        while True:
+            idx = self._queue.get()
+            try:
+                self.get(idx)
+            except Exception as e:
+                print(f"Level {idx} prefetch failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = LevelCache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile levels/levelN.json into binary .gtl files")
+    parser.add_argument("paths", nargs="*", help="JSON files (default: all levels in levels/)")
+    args = parser.parse_args()
+    for path in args.paths or sorted(glob.glob(os.path.join(LEVELS_DIR, "level*.json"))):
+        print(f"{path} -> {compile_level(path)}")
+
+
+if __name__ == "__main__":
+    main()
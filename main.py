@@ -1,280 +1,74 @@
-import pygame
+import argparse
+import os
 import random
 import sys
-import json
-import os
+import time
+
+import pygame
+
+from assets import Assets
+from perf import FrameProfiler, TraceWriter
+from render import Renderer
+from replay import Recorder
+from world import FPS, STEP_MS, Inputs, World
 
-pygame.init()
 WIDTH, HEIGHT = 800, 600
-win = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("GooseTanks")
-
-clock = pygame.time.Clock()
-font = pygame.font.SysFont("Arial", 20)
-
-# TODO: Замени на загрузку реальных спрайтов
-goose_img = pygame.Surface((40, 40))
-goose_img.fill((255, 255, 0))
-enemy_img = pygame.Surface((40, 40))
-enemy_img.fill((255, 0, 0))
-bullet_img = pygame.Surface((10, 5))
-bullet_img.fill((0, 255, 0))
-
-# Игровые переменные
-goose_rect = goose_img.get_rect(topleft=(50, 50))
-bullets = []
-walls = []
-enemies = []
-bonuses = []
-
-health = 3
-invulnerable = 0
-fire_cooldown = 0
-speed_boost = 0
-level_index = 1
-game_over = False
-level_completed = False
+# Не больше стольких шагов симуляции за один кадр отрисовки,
+# иначе после долгого подвисания игра начнёт «догонять» бесконечно
+MAX_STEPS_PER_FRAME = 5
+
+win = None
+clock = None
+font = None
+assets = None
+renderer = None
+
 paused = False
-facing = "right"
-
-
-class Enemy:
-    def __init__(self, x, y):
-        self.rect = enemy_img.get_rect(topleft=(x, y))
-        self.speed = 2
-        self.state = "patrolling"
-        patrol_range = random.randint(100, 200)
-        self.patrol_points = [x, min(x + patrol_range, WIDTH - self.rect.width - 20)]
-        self.direction = 1
-
-    def update(self):
-        if self.state == "patrolling":
-            self._move(self.speed * self.direction, 0)
-            if self.rect.x < self.patrol_points[0] or self.rect.x > self.patrol_points[1]:
-                self.direction *= -1
-        elif self.state == "chasing":
-            dx = dy = 0
-            if self.rect.x < goose_rect.x:
-                dx = self.speed
-            elif self.rect.x > goose_rect.x:
-                dx = -self.speed
-            if self.rect.y < goose_rect.y:
-                dy = self.speed
-            elif self.rect.y > goose_rect.y:
-                dy = -self.speed
-            self._move(dx, dy)
-
-    def _move(self, dx, dy):
-        # По X
-        self.rect.x += dx
-        if any(self.rect.colliderect(w) for w in walls):
-            self.rect.x -= dx
-
-        # По Y
-        self.rect.y += dy
-        if any(self.rect.colliderect(w) for w in walls):
-            self.rect.y -= dy
-
-        # Границы окна
-        self.rect.clamp_ip(pygame.Rect(20, 20, WIDTH - 40, HEIGHT - 40))
-
-    def can_see_goose(self):
-        vision_rect = self.rect.inflate(200, 200)
-        return vision_rect.colliderect(goose_rect)
-
-
-
-class Bullet:
-    def __init__(self, x, y, vx, vy):
-        self.rect = bullet_img.get_rect(center=(x, y))
-        self.vx = vx
-        self.vy = vy
-
-    def update(self):
-        self.rect.x += self.vx
-        self.rect.y += self.vy
-
-    def draw(self, surface):
-        surface.blit(bullet_img, self.rect)
-
-
-class Bonus:
-    def __init__(self, x, y, btype):
-        self.rect = pygame.Rect(x, y, 30, 30)
-        self.type = btype
-        self.color = {"health": (200, 0, 0), "shield": (0, 100, 255), "speed": (255, 255, 0)}[btype]
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect)
-
-
-def spawn_enemies(n):
-    result = []
-    attempts = 0
-    inset = 60
-    while len(result) < n and attempts < 200:
-        x = random.randint(inset, WIDTH - inset - 40)
-        y = random.randint(inset, HEIGHT - inset - 40)
-        r = pygame.Rect(x, y, 40, 40)
-        if r.colliderect(goose_rect):
-            attempts += 1
-            continue
-        if any(r.colliderect(w) for w in walls):
-            attempts += 1
-            continue
-        result.append(Enemy(x, y))
-        attempts += 1
-    return result
-
-
-
-def load_level(idx):
-    global walls, enemies, bonuses
-    path = f"levels/level{idx}.json"
-    if not os.path.exists(path):
-        print(f"Level {idx} not found. Game completed.")
-        return
+recording_path = None
 
-    with open(path) as f:
-        data = json.load(f)
-
-    walls = [pygame.Rect(*w) for w in data.get("walls", [])]
-    enemies.clear()
-    for x, y in data.get("enemies", []):
-        enemies.append(Enemy(x, y))
-    bonuses.clear()
-    for b in data.get("bonuses", []):
-        bx, by, btype = b
-        bonuses.append(Bonus(bx, by, btype))
-
-
-
-def draw_window():
-    win.fill((30, 30, 30))
-    for w in walls:
-        pygame.draw.rect(win, (100, 100, 100), w)
-    for bullet in bullets:
-        bullet.draw(win)
-    for enemy in enemies:
-        win.blit(enemy_img, enemy.rect)
-    for bonus in bonuses:
-        bonus.draw(win)
-    if not game_over:
-        win.blit(goose_img, goose_rect)
-    else:
-        over_text = font.render("GAME OVER - Press R to restart", True, (255, 0, 0))
-        win.blit(over_text, (WIDTH // 2 - 140, HEIGHT // 2))
-    if level_completed:
-        completed_text = font.render("LEVEL COMPLETED! Press N for next level", True, (0, 255, 0))
-        win.blit(completed_text, (WIDTH // 2 - 180, HEIGHT // 2 - 40))
-
-    health_surface = font.render(f"Health: {health}", True, (255, 255, 255))
-    win.blit(health_surface, (WIDTH - 120, 10))
-    pygame.display.update()
-
-
-def handle_movement(keys):
-    global facing
-    speed = 7 if speed_boost > 0 else 4
-    orig = goose_rect.copy()
-    if keys[pygame.K_a]:
-        goose_rect.x -= speed
-        facing = "left"
-    if keys[pygame.K_d]:
-        goose_rect.x += speed
-        facing = "right"
-    if keys[pygame.K_w]:
-        goose_rect.y -= speed
-        facing = "up"
-    if keys[pygame.K_s]:
-        goose_rect.y += speed
-        facing = "down"
-
-    # Ограничения по экрану
-    goose_rect.x = max(20, min(goose_rect.x, WIDTH - goose_rect.width - 20))
-    goose_rect.y = max(20, min(goose_rect.y, HEIGHT - goose_rect.height - 20))
-
-    # Проверка коллизий со стенами
-    for wall in walls:
-        if goose_rect.colliderect(wall):
-            goose_rect.topleft = orig.topleft
-
-
-def handle_bullets():
-    global bullets, enemies
-    for b in bullets[:]:
-        b.update()
-        if (b.rect.x > WIDTH or b.rect.x < 0 or b.rect.y > HEIGHT or b.rect.y < 0
-                or any(b.rect.colliderect(w) for w in walls)):
-            bullets.remove(b)
-            continue
-        for enemy in enemies[:]:
-            if b.rect.colliderect(enemy.rect):
-                bullets.remove(b)
-                enemies.remove(enemy)
-                break
-
-
-def update_enemies():
-    global health, invulnerable, game_over, level_completed
-    for enemy in enemies:
-        if enemy.can_see_goose():
-            enemy.state = "chasing"
-        else:
-            enemy.state = "patrolling"
-        enemy.update()
 
-        if not game_over and enemy.rect.colliderect(goose_rect) and invulnerable == 0:
-            health -= 1
-            invulnerable = 60
-            if health <= 0:
-                game_over = True
+def init_display(headless=False):
+    global win, clock, font, assets, renderer
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("GooseTanks")
 
-    if len(enemies) == 0 and not level_completed:
-        level_completed = True
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("Arial", 20)
 
+    # Спрайты и звук грузятся в фоне, пока не готовы — рисуются заглушки
+    assets = Assets()
+    renderer = Renderer(win, font, assets)
 
-def shoot():
-    global fire_cooldown
-    if fire_cooldown < 20:
-        return
-    dir_map = {
-        "right": (10, 0),
-        "left": (-10, 0),
-        "up": (0, -10),
-        "down": (0, 10)
-    }
-    vx, vy = dir_map.get(facing, (10, 0))
-    b = Bullet(goose_rect.centerx, goose_rect.centery, vx, vy)
-    bullets.append(b)
-    fire_cooldown = 0
-
-
-def reset_game():
-    global goose_rect, bullets, health, invulnerable, game_over, level_completed, speed_boost
-    goose_rect.topleft = (50, 50)
-    bullets.clear()
-    health = 3
-    invulnerable = 0
-    game_over = False
-    level_completed = False
-    speed_boost = 0
-    load_level(level_index)
-    bonuses.clear()
+
+def read_inputs(keys, restart=False, next_level=False):
+    return Inputs(
+        left=keys[pygame.K_a],
+        right=keys[pygame.K_d],
+        up=keys[pygame.K_w],
+        down=keys[pygame.K_s],
+        fire=keys[pygame.K_SPACE],
+        restart=restart,
+        next_level=next_level,
+    )
+
+
+def draw_window(world, message=None, profiler=None):
+    renderer.draw(world, message, profiler)
 
 
 def menu_loop(level_done=False):
     selected_idx = 0
     options = ["Start", "Exit"] if not level_done else ["Next Level", "Exit"]
+    drawn_idx = None
     while True:
         clock.tick(60)
-        win.fill((20, 20, 20))
-        for i, option in enumerate(options):
-            color = (255, 255, 255) if i == selected_idx else (150, 150, 150)
-            text_surf = font.render(option, True, color)
-            rect = text_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 + i * 40))
-            win.blit(text_surf, rect)
-        pygame.display.update()
+        # Меню статично — перерисовываем только при смене выбора
+        if drawn_idx != selected_idx:
+            renderer.draw_menu(options, selected_idx)
+            drawn_idx = selected_idx
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -293,76 +87,155 @@ def menu_loop(level_done=False):
                         sys.exit()
 
 
-def game_loop():
-    global fire_cooldown, invulnerable, game_over, paused, speed_boost, level_index, health
-    fire_cooldown = 0
+def game_loop(world, recorder=None, profiler=None, trace=None):
+    global WIDTH, HEIGHT, win, paused
+    # При записи шаги и смены размера идут через Recorder
+    sim = recorder or world
     run = True
+    accumulator = 0.0
+    pause_drawn = False
+    show_perf = False
+    shots = world.shots
+    # R и N — одноразовые команды: держим их, пока их не заберёт шаг симуляции,
+    # иначе нажатие в кадре без шагов (накопилось меньше STEP_MS) теряется
+    restart = next_level = False
     while run:
-        clock.tick(60)
-        fire_cooldown += 1
-        if invulnerable > 0:
-            invulnerable -= 1
-        if speed_boost > 0:
-            speed_boost -= 1
+        accumulator += clock.tick(FPS)
+        if profiler is not None:
+            profiler.begin()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
             elif event.type == pygame.VIDEORESIZE:
-                global WIDTH, HEIGHT
                 WIDTH, HEIGHT = event.w, event.h
-                pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-                load_level(level_index)
+                win = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+                renderer.resize(win)
+                sim.resize(WIDTH, HEIGHT)
+                pause_drawn = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_p:
-                    global paused
                     paused = not paused
-                elif event.key == pygame.K_r and game_over:
-                    reset_game()
-                elif event.key == pygame.K_n and level_completed:
-                    level_index += 1
-                    reset_game()
+                    pause_drawn = False
+                elif event.key == pygame.K_r:
+                    restart = True
+                elif event.key == pygame.K_n:
+                    next_level = True
+                elif event.key == pygame.K_F3:
+                    # Оверлей производительности; замеры включаются при первом показе
+                    show_perf = not show_perf
+                    if profiler is None:
+                        profiler = FrameProfiler()
+                        profiler.begin()
+        if profiler is not None:
+            profiler.mark("events")
 
         if paused:
-            draw_window()
-            paused_text = font.render("PAUSED - Press P to resume", True, (255, 255, 0))
-            win.blit(paused_text, (WIDTH // 2 - 160, HEIGHT // 2))
-            pygame.display.update()
-            continue
-
-        keys = pygame.key.get_pressed()
-        if not game_over and not level_completed:
-            handle_movement(keys)
-            if keys[pygame.K_SPACE]:
-                shoot()
-            handle_bullets()
-            update_enemies()
-
-            # Проверка бонусов
-            for bonus in bonuses[:]:
-                if goose_rect.colliderect(bonus.rect):
-                    if bonus.type == "health":
-                        if health < 5:
-                            health += 1
-                    elif bonus.type == "shield":
-                        invulnerable = 180
-                    elif bonus.type == "speed":
-                        speed_boost = 180
-                    bonuses.remove(bonus)
-
-            # Спавн бонусов (примерно раз в 7 секунд)
-            if pygame.time.get_ticks() % 7000 < 60 and len(bonuses) < 2:
-                bx, by = random.randint(50, WIDTH - 80), random.randint(50, HEIGHT - 80)
-                if not any(pygame.Rect(bx, by, 30, 30).colliderect(w) for w in walls):
-                    bonuses.append(Bonus(bx, by, random.choice(["health", "shield", "speed"])))
-
-        draw_window()
-
+            accumulator = 0.0
+            # Пока стоит пауза, картинка не меняется — рисуем её один раз
+            if not pause_drawn:
+                draw_window(world, ("PAUSED - Press P to resume", (255, 255, 0), -160),
+                            profiler if show_perf else None)
+                pause_drawn = True
+        else:
+            # Фиксированный шаг: симуляция идёт по STEP_MS независимо от частоты кадров
+            keys = pygame.key.get_pressed()
+            steps = 0
+            while accumulator >= STEP_MS and steps < MAX_STEPS_PER_FRAME:
+                sim.step(read_inputs(keys, restart, next_level), profiler)
+                restart = next_level = False
+                accumulator -= STEP_MS
+                steps += 1
+            if steps == MAX_STEPS_PER_FRAME:
+                accumulator = 0.0
+            # Звук — по счётчику выстрелов мира: симуляция сама ничего не проигрывает
+            if world.shots != shots:
+                shots = world.shots
+                assets.play_shot()
+
+            draw_window(world, profiler=profiler if show_perf else None)
+
+        if profiler is not None:
+            profiler.mark("draw")
+            profiler.end_frame(world)
+            if trace is not None:
+                trace.write(profiler.record())
+
+    if recorder is not None:
+        recorder.save(recording_path)
+    if trace is not None:
+        trace.close()
     pygame.quit()
     sys.exit()
 
 
-if __name__ == "__main__":
-    load_level(level_index)
+def random_policy(rng, hold=30):
+    # Простой бот для безголового режима: меняет направление раз в hold шагов
+    inputs = Inputs()
+    frame = 0
+    while True:
+        if frame % hold == 0:
+            direction = rng.choice(["left", "right", "up", "down"])
+            inputs = Inputs(fire=rng.random() < 0.5, restart=True, **{direction: True})
+        yield inputs
+        frame += 1
+
+
+def make_world(level_index, seed=None, swarm=False):
+    if swarm:
+        from swarm import SwarmWorld
+        return SwarmWorld(WIDTH, HEIGHT, level_index, seed=seed)
+    return World(WIDTH, HEIGHT, level_index, seed=seed)
+
+
+def run_headless(frames, level_index, seed=None, swarm=False, record=None):
+    init_display(headless=True)
+    world = make_world(level_index, seed, swarm)
+    world.load_level(world.level_index)
+    sim = Recorder(world) if record else world
+    policy = random_policy(random.Random(world.seed))
+    start = time.perf_counter()
+    for _ in range(frames):
+        sim.step(next(policy))
+    elapsed = time.perf_counter() - start
+    if record:
+        sim.save(record)
+    print(f"{frames} steps in {elapsed:.2f}s ({frames / elapsed:.0f} steps/s), "
+          f"level {world.level_index}, health {world.health}, enemies left {world.enemy_count}")
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GooseTanks")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without a window as fast as possible")
+    parser.add_argument("--frames", type=int, default=10000, help="number of steps in headless mode")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--swarm", action="store_true",
+                        help="keep enemies and bullets in numpy arrays (needs numpy)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record inputs and state hashes for replay.py")
+    parser.add_argument("--perf", action="store_true",
+                        help="collect per-stage frame timings (F3 shows the overlay)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="write per-frame timings to a .csv or .jsonl file (implies --perf)")
+    args = parser.parse_args()
+
+    if args.headless:
+        run_headless(args.frames, args.level, args.seed, args.swarm, args.record)
+        return
+
+    global recording_path
+    recording_path = args.record
+    init_display()
+    world = make_world(args.level, args.seed, args.swarm)
+    world.load_level(world.level_index)
     menu_loop()
-    game_loop()
+    profiler = FrameProfiler() if args.perf or args.trace else None
+    trace = TraceWriter(args.trace) if args.trace else None
+    game_loop(world, Recorder(world) if args.record else None, profiler, trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+from array import array
+
+NAV_CELL = 20
+# Дальше этого (в клетках) поле потоков не считается: так далеко враги всё равно не гонятся
+FLOW_RADIUS = 40
+# Дальность зрения врага от центра до центра, px
+VISION_RANGE = 140
+INF = float("inf")
+
+NEIGHBOURS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+
+class NavGrid:
+    # Клетки по NAV_CELL px. blocked — клетку задевает стена (для лучей видимости),
+    # walkable — враг размера agent_size может стоять, когда его левый верхний
+    # угол совпадает с углом клетки (для поиска пути).
+    def __init__(self, walls, width, height, agent_size=(40, 40), margin=20, cell=NAV_CELL):
+        self.cell = cell
+        self.cols = -(-width // cell)
+        self.rows = -(-height // cell)
+        cols, rows = self.cols, self.rows
+        self.blocked = bytearray(cols * rows)
+        for w in walls:
+            x0, x1 = max(0, w.left // cell), min(cols - 1, (w.right - 1) // cell)
+            y0, y1 = max(0, w.top // cell), min(rows - 1, (w.bottom - 1) // cell)
+            if x0 > x1 or y0 > y1:
+                continue
+            for cy in range(y0, y1 + 1):
+                self.blocked[cy * cols + x0:cy * cols + x1 + 1] = b"\x01" * (x1 - x0 + 1)
+
+        # Враг не выходит за рамку margin (см. Enemy._move), поэтому за ней клетки закрыты
+        aw, ah = agent_size
+        fw, fh = -(-aw // cell), -(-ah // cell)
+        x_min, x_max = -(-margin // cell), (width - margin - aw) // cell
+        y_min, y_max = -(-margin // cell), (height - margin - ah) // cell
+        self.walkable = bytearray(cols * rows)
+        blocked = self.blocked
+        for cy in range(max(0, y_min), min(rows - fh, y_max) + 1):
+            for cx in range(max(0, x_min), min(cols - fw, x_max) + 1):
+                if not any(any(blocked[(cy + j) * cols + cx:(cy + j) * cols + cx + fw])
+                           for j in range(fh)):
+                    self.walkable[cy * cols + cx] = 1
+
+    @classmethod
+    def from_cells(cls, cell, cols, rows, blocked, walkable):
+        # Сетка из готовых байтов (скомпилированный уровень), без растеризации стен
+        nav = cls.__new__(cls)
+        nav.cell, nav.cols, nav.rows = cell, cols, rows
+        nav.blocked, nav.walkable = blocked, walkable
+        return nav
+
+    def cell_at(self, x, y):
+        # Ближайший угол клетки к точке (x, y), -1 за пределами сетки
+        half = self.cell // 2
+        cx, cy = (x + half) // self.cell, (y + half) // self.cell
+        if 0 <= cx < self.cols and 0 <= cy < self.rows:
+            return cy * self.cols + cx
+        return -1
+
+    def _is_blocked(self, cx, cy):
+        if 0 <= cx < self.cols and 0 <= cy < self.rows:
+            return self.blocked[cy * self.cols + cx]
+        return True
+
+    def line_of_sight(self, x0, y0, x1, y1):
+        # Обход клеток вдоль отрезка (Amanatides–Woo); клетки концов не проверяются,
+        # чтобы стена, касающаяся самих объектов, не закрывала обзор
+        cell = self.cell
+        cx, cy = int(x0 // cell), int(y0 // cell)
+        ex, ey = int(x1 // cell), int(y1 // cell)
+        dx, dy = x1 - x0, y1 - y0
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        t_max_x = ((cx + (step_x > 0)) * cell - x0) / dx if dx else INF
+        t_max_y = ((cy + (step_y > 0)) * cell - y0) / dy if dy else INF
+        t_delta_x = cell / abs(dx) if dx else INF
+        t_delta_y = cell / abs(dy) if dy else INF
+        for _ in range(abs(ex - cx) + abs(ey - cy) - 1):
+            if t_max_x < t_max_y:
+                t_max_x += t_delta_x
+                cx += step_x
+            else:
+                t_max_y += t_delta_y
+                cy += step_y
+            if self._is_blocked(cx, cy):
+                return False
+        return True
+
+    def can_see(self, rect, target, max_range=VISION_RANGE):
+        x0, y0 = rect.center
+        x1, y1 = target.center
+        if (x1 - x0) ** 2 + (y1 - y0) ** 2 > max_range * max_range:
+            return False
+        return self.line_of_sight(x0, y0, x1, y1)
+
+
+class FlowField:
+    # Одно поле на всех преследователей: BFS от клетки гуся, для каждой клетки
+    # хранится следующая клетка по кратчайшему пути. Пересчитывается только
+    # когда гусь переходит в другую клетку, и не дальше radius клеток.
+    def __init__(self, nav, radius=FLOW_RADIUS):
+        self.nav = nav
+        self.radius = radius
+        self.goal = -1
+        self.next_cell = array("i", [-1]) * (nav.cols * nav.rows)
+        self._dist = array("i", [-1]) * (nav.cols * nav.rows)
+        # Клетки, до которых дошёл последний BFS, по порядку обхода — они же его очередь.
+        # Массив на всё поле создаётся один раз: пересчёт поля ничего не выделяет
+        self._touched = array("i", [0]) * (nav.cols * nav.rows)
+        self._touched_count = 0
+        self._stale = False
+
+    def track(self, rect):
+        goal = self.nav.cell_at(rect.x, rect.y)
+        if goal != self.goal:
+            self.goal = goal
+            self._stale = True
+
+    def _rebuild(self):
+        self._stale = False
+        next_cell, dist = self.next_cell, self._dist
+        touched = self._touched
+        for i in range(self._touched_count):
+            c = touched[i]
+            next_cell[c] = -1
+            dist[c] = -1
+        self._touched_count = 0
+        if self.goal < 0:
+            return
+
+        nav = self.nav
+        cols, rows, walkable = nav.cols, nav.rows, nav.walkable
+        dist[self.goal] = 0
+        touched[0] = self.goal
+        head, count = 0, 1
+        while head < count:
+            c = touched[head]
+            head += 1
+            d = dist[c] + 1
+            if d > self.radius:
+                continue
+            cx, cy = c % cols, c // cols
+            for ox, oy in NEIGHBOURS:
+                nx, ny = cx + ox, cy + oy
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    continue
+                n = ny * cols + nx
+                if dist[n] >= 0 or not walkable[n]:
+                    continue
+                # По диагонали — только если не срезаем угол стены
+                if ox and oy and not (walkable[cy * cols + nx] and walkable[ny * cols + cx]):
+                    continue
+                dist[n] = d
+                next_cell[n] = c
+                touched[count] = n
+                count += 1
+        self._touched_count = count
+
+    def arrays(self):
+        # next_cell для пакетного чтения (SwarmWorld); сначала догоняем гуся
+        if self._stale:
+            self._rebuild()
+        return self.next_cell
+
+    def steer(self, rect, speed, target):
+        # Шаг (dx, dy) к следующей клетке пути; вне поля или в клетке цели — прямо к цели.
+        # Не дальше точки: иначе враг не на сетке клеток качается вокруг ряда каждый шаг
+        if self._stale:
+            self._rebuild()
+        nav = self.nav
+        c = nav.cell_at(rect.x, rect.y)
+        n = self.next_cell[c] if c >= 0 else -1
+        if n < 0:
+            tx, ty = target.x, target.y
+        else:
+            tx, ty = n % nav.cols * nav.cell, n // nav.cols * nav.cell
+        return max(-speed, min(speed, tx - rect.x)), max(-speed, min(speed, ty - rect.y))
@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import random
+
+import pygame
+
+from levels import BONUS_TYPES
+from net_server import DEFAULT_PORT
+from netcode import (BONUS, BULLET, BYE, BYE_FMT, ENEMY, GOOSE, HELLO, HELLO_FMT, INPUT, INPUT_FMT,
+                     PROTOCOL_VERSION, SNAPSHOT, WELCOME, WELCOME_FMT, ProtocolError, decode_snapshot,
+                     unpack_goose_extra)
+from replay import encode_inputs
+from world import BULLET_SIZE, ENEMY_SIZE, FPS, GOOSE_SIZE, Bonus, Inputs, World
+
+# Клиент арены: шлёт ввод, принимает снимки и рисует мир с задержкой
+# INTERP_DELAY снимков, плавно двигая сущности между двумя соседними снимками
+INTERP_DELAY = 2
+# Столько принятых снимков хранится как возможные baseline для следующих
+HISTORY = 32
+# Сдвиг дальше этого за один интервал — телепорт (возрождение), не интерполируем
+TELEPORT_DISTANCE = 100
+HELLO_RETRY = 0.5
+# Насколько быстро оценка тика сервера подстраивается под пришедшие снимки
+CLOCK_SMOOTHING = 0.1
+
+
+class SnapshotBuffer:
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self.states = {}
+        self.latest = 0
+
+    def receive(self, data):
+        # -> тик снимка или None, если он устарел; ProtocolError, если baseline неизвестен
+        tick, _, state = decode_snapshot(data, self.states)
+        if tick <= self.latest:
+            return None
+        self.states[tick] = state
+        self.latest = tick
+        for old in [t for t in self.states if t <= tick - self.history]:
+            del self.states[old]
+        return tick
+
+    def sample(self, tick):
+        # Состояние на дробный тик: между соседними снимками — линейно;
+        # раньше первого или позже последнего — ближайший снимок как есть
+        states = self.states
+        if not states:
+            return {}
+        before = max((t for t in states if t <= tick), default=None)
+        after = min((t for t in states if t > tick), default=None)
+        if before is None or after is None:
+            return states[after if before is None else before]
+        f = (tick - before) / (after - before)
+        old_state = states[before]
+        result = {}
+        for net_id, entity in states[after].items():
+            old = old_state.get(net_id)
+            if old is None or old[0] != entity[0]:
+                result[net_id] = entity
+                continue
+            kind, x, y, extra = entity
+            dx, dy = x - old[1], y - old[2]
+            if abs(dx) + abs(dy) > TELEPORT_DISTANCE:
+                result[net_id] = entity
+            else:
+                result[net_id] = (kind, round(old[1] + dx * f), round(old[2] + dy * f), extra)
+        return result
+
+
+class ArenaClient(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.buffer = SnapshotBuffer()
+        self.welcomed = asyncio.Event()
+        self.goose_id = None
+        self.level_index = None
+        self.tick_rate = FPS
+        self.snapshot_every = 1
+        self.input_seq = 0
+        # Оценка тика сервера: тик - время * частота, сглаженная по снимкам
+        self._clock_offset = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.snapshots = 0
+        self.dropped = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.hello()
+
+    def _send(self, data):
+        self.bytes_out += len(data)
+        self.transport.sendto(data)
+
+    def hello(self):
+        self._send(HELLO_FMT.pack(HELLO, PROTOCOL_VERSION))
+
+    def send_inputs(self, inputs):
+        self.input_seq += 1
+        self._send(INPUT_FMT.pack(INPUT, self.input_seq, self.buffer.latest, encode_inputs(inputs)))
+
+    def bye(self):
+        self._send(BYE_FMT.pack(BYE))
+
+    def datagram_received(self, data, addr):
+        self.bytes_in += len(data)
+        if not data:
+            return
+        if data[0] == WELCOME and not self.welcomed.is_set():
+            _, self.goose_id, self.level_index, self.tick_rate, self.snapshot_every = WELCOME_FMT.unpack(data)
+            self.welcomed.set()
+        elif data[0] == SNAPSHOT and self.welcomed.is_set():
+            try:
+                tick = self.buffer.receive(data)
+            except ProtocolError:
+                # Baseline уже выброшен — сервер пришлёт полный снимок, когда увидит наш ack
+                self.dropped += 1
+                return
+            if tick is None:
+                return
+            self.snapshots += 1
+            offset = tick - asyncio.get_running_loop().time() * self.tick_rate
+            if self._clock_offset is None or offset > self._clock_offset:
+                # Вперёд догоняем сразу: снимок не может прийти раньше, чем был сделан
+                self._clock_offset = offset
+            else:
+                self._clock_offset += (offset - self._clock_offset) * CLOCK_SMOOTHING
+
+    def render_tick(self, now):
+        # Тик, который сейчас рисовать: чуть в прошлом, чтобы было между чем интерполировать
+        if self._clock_offset is None:
+            return 0
+        return now * self.tick_rate + self._clock_offset - INTERP_DELAY * self.snapshot_every
+
+
+async def connect(host, port, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    transport, client = await loop.create_datagram_endpoint(ArenaClient, remote_addr=(host, port))
+    deadline = loop.time() + timeout
+    # HELLO по UDP может потеряться — повторяем, пока не ответят
+    while not client.welcomed.is_set():
+        if loop.time() > deadline:
+            transport.close()
+            raise ConnectionError(f"no answer from {host}:{port}")
+        try:
+            await asyncio.wait_for(client.welcomed.wait(), HELLO_RETRY)
+        except asyncio.TimeoutError:
+            client.hello()
+    return transport, client
+
+
+class RemoteWorld(World):
+    # Мир на стороне клиента: стены из своего файла уровня, всё остальное — из
+    # интерполированных снимков сервера. Сам не шагает, только отдаёт рендеру
+    # то же, что и World: enemy_rects, bullet_rects, bonuses, geese и камеру
+    def __init__(self, width, height, level_index, goose_id):
+        super().__init__(width, height, level_index=level_index)
+        if not self.load_level(level_index):
+            raise ValueError(f"level {level_index} not found")
+        self.clear_enemies()
+        self.goose_id = goose_id
+        self.alive = False
+        self._enemies = []
+        self._bullets = []
+        self._geese = []
+
+    def apply(self, state):
+        self._enemies.clear()
+        self._bullets.clear()
+        self._geese.clear()
+        self.bonuses.clear()
+        for net_id, (kind, x, y, extra) in state.items():
+            if kind == GOOSE:
+                facing, health, _ = unpack_goose_extra(extra)
+                if net_id == self.goose_id:
+                    self.goose_rect.topleft = (x, y)
+                    self.facing, self.health = facing, health
+                    self.alive = health > 0
+                    if not self.alive:
+                        continue
+                elif health <= 0:
+                    continue
+                self._geese.append((pygame.Rect((x, y), GOOSE_SIZE), facing))
+            elif kind == ENEMY:
+                self._enemies.append(pygame.Rect((x, y), ENEMY_SIZE))
+            elif kind == BULLET:
+                self._bullets.append(pygame.Rect((x, y), BULLET_SIZE))
+            elif kind == BONUS:
+                self.bonuses.append(Bonus(x, y, BONUS_TYPES[extra]))
+        self.update_camera()
+
+    def geese(self):
+        return self._geese
+
+    def enemy_rects(self, area=None):
+        return self._enemies if area is None else [r for r in self._enemies if area.colliderect(r)]
+
+    def bullet_rects(self, area=None):
+        return self._bullets if area is None else [r for r in self._bullets if area.colliderect(r)]
+
+
+async def play(host, port):
+    import main
+    main.init_display()
+    transport, client = await connect(host, port)
+    loop = asyncio.get_running_loop()
+    world = RemoteWorld(main.WIDTH, main.HEIGHT, client.level_index, client.goose_id)
+    try:
+        next_frame = loop.time()
+        run = True
+        while run:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    run = False
+                elif event.type == pygame.VIDEORESIZE:
+                    main.WIDTH, main.HEIGHT = event.w, event.h
+                    main.win = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                    main.renderer.resize(main.win)
+                    world.resize(event.w, event.h)
+            client.send_inputs(main.read_inputs(pygame.key.get_pressed()))
+            world.apply(client.buffer.sample(client.render_tick(loop.time())))
+            message = None if world.alive else ("Respawning...", (255, 255, 0), -60)
+            main.draw_window(world, message)
+            next_frame += 1 / FPS
+            await asyncio.sleep(max(0.0, next_frame - loop.time()))
+    finally:
+        client.bye()
+        transport.close()
+        pygame.quit()
+
+
+def random_bot(rng, hold=30):
+    # Как random_policy в main.py, но без restart — на арене он не нужен
+    inputs = Inputs()
+    frame = 0
+    while True:
+        if frame % hold == 0:
+            direction = rng.choice(["left", "right", "up", "down"])
+            inputs = Inputs(fire=rng.random() < 0.5, **{direction: True})
+        yield inputs
+        frame += 1
+
+
+async def run_bot(host, port, duration, seed=None, sample=True):
+    # Имитация игрока для проверки и нагрузочного теста: ввод раз в снимок;
+    # sample=True ещё и интерполирует состояние, как это делал бы рендер
+    transport, client = await connect(host, port)
+    loop = asyncio.get_running_loop()
+    policy = random_bot(random.Random(seed), hold=max(1, 30 // client.snapshot_every))
+    end = loop.time() + duration
+    interval = client.snapshot_every / client.tick_rate
+    try:
+        while loop.time() < end:
+            client.send_inputs(next(policy))
+            if sample:
+                client.buffer.sample(client.render_tick(loop.time()))
+            await asyncio.sleep(interval)
+    finally:
+        client.bye()
+        transport.close()
+    return client
+
+
+async def run_bots(host, port, count, duration, seed=0):
+    clients = await asyncio.gather(*(run_bot(host, port, duration, seed + i) for i in range(count)))
+    for i, client in enumerate(clients):
+        print(f"bot {i}: {client.snapshots} snapshots, {client.bytes_in / duration / 1024:.1f} KB/s in, "
+              f"{client.bytes_out / duration:.0f} B/s out, {client.dropped} undecodable")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connect to a GooseTanks arena server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--bots", type=int, help="run this many simulated players instead of a window")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long the bots play")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        if args.bots:
+            asyncio.run(run_bots(args.host, args.port, args.bots, args.seconds, args.seed))
+        else:
+            asyncio.run(play(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import statistics
+import struct
+import time
+
+import pygame
+
+from arena import Arena
+from levels import BONUS_TYPES
+from netcode import (BULLET, BYE, BONUS, ENEMY, GOOSE, HELLO, HELLO_FMT, INPUT, INPUT_FMT,
+                     PROTOCOL_VERSION, WELCOME, WELCOME_FMT, encode_snapshot, goose_extra)
+from perf import percentile
+from replay import decode_inputs
+from world import FPS
+
+# Авторитетный сервер арены: мир шагает с фиксированной частотой FPS, клиенты
+# присылают только ввод, а получают снимки видимой части мира
+DEFAULT_PORT = 9917
+# Снимок клиенту раз в столько тиков (30 в секунду при FPS = 60)
+SNAPSHOT_EVERY = 2
+# Область вокруг гуся, сущности из которой попадают в снимок: окно 800x600 с запасом
+INTEREST_SIZE = (1200, 1000)
+# Сколько отправленных снимков помнить на клиента: старее подтверждённого
+# они не нужны, а если клиент долго молчит — шлём полный снимок
+HISTORY = 32
+CLIENT_TIMEOUT = 5.0
+# Если сервер отстал больше чем на столько тиков, догонять не пытаемся
+MAX_LAG_TICKS = 5
+
+
+class Client:
+    def __init__(self, addr, player, now):
+        self.addr = addr
+        self.player = player
+        self.input_seq = 0
+        self.ack = 0
+        self.history = {}
+        self.last_seen = now
+        self.interest = pygame.Rect((0, 0), INTEREST_SIZE)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.snapshots = 0
+        self.full_snapshots = 0
+
+
+def visible_state(arena, area, own):
+    # {net_id: (kind, x, y, extra)} всего, что задевает area; свой гусь — всегда, даже мёртвый
+    net_ids = arena.net_ids
+    state = {}
+    for player in arena.players.values():
+        if player is own or (player.alive and area.colliderect(player.rect)):
+            state[net_ids[id(player)]] = (GOOSE, player.rect.x, player.rect.y,
+                                          goose_extra(player.facing, player.health, player.invulnerable))
+    for enemy in arena.enemy_grid.collide_list(area):
+        state[net_ids[id(enemy)]] = (ENEMY, enemy.rect.x, enemy.rect.y, int(enemy.state == "chasing"))
+    for bullet in arena.bullets:
+        if area.colliderect(bullet.rect):
+            state[net_ids[id(bullet)]] = (BULLET, bullet.rect.x, bullet.rect.y, 0)
+    for bonus in arena.bonuses:
+        if area.colliderect(bonus.rect):
+            # У бонусов нет своих номеров: они не двигаются, номер — из координат и типа
+            key = 1 << 31 | bonus.rect.x << 15 | bonus.rect.y
+            state[key] = (BONUS, bonus.rect.x, bonus.rect.y, BONUS_TYPES.index(bonus.type))
+    return state
+
+
+class ArenaServer(asyncio.DatagramProtocol):
+    # delta=False — всегда полные снимки (для сравнения трафика в benchmarks/net_load.py)
+    def __init__(self, arena, snapshot_every=SNAPSHOT_EVERY, delta=True, verbose=True):
+        self.arena = arena
+        self.snapshot_every = snapshot_every
+        self.delta = delta
+        self.verbose = verbose
+        self.clients = {}
+        self.transport = None
+        self.running = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.tick_times = []
+        self.late_ticks = 0
+        self.stats_since = time.perf_counter()
+        for client in self.clients.values():
+            client.bytes_in = client.bytes_out = client.snapshots = client.full_snapshots = 0
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        # Битые и чужие пакеты молча отбрасываются: это UDP, отправитель может быть кем угодно
+        if not data:
+            return
+        try:
+            if data[0] == HELLO:
+                self._hello(data, addr)
+            elif data[0] == INPUT:
+                self._input(data, addr)
+            elif data[0] == BYE and addr in self.clients:
+                self.drop(addr, "left")
+        except struct.error:
+            pass
+
+    def _hello(self, data, addr):
+        _, version = HELLO_FMT.unpack(data)
+        if version != PROTOCOL_VERSION:
+            return
+        client = self.clients.get(addr)
+        if client is None:
+            # Повторный HELLO (потерялся WELCOME) не создаёт второго гуся
+            player = self.arena.add_player()
+            client = self.clients[addr] = Client(addr, player, time.monotonic())
+            self.log(f"{addr[0]}:{addr[1]} joined as player {player.id} ({len(self.clients)} online)")
+        client.bytes_in += len(data)
+        self._send(client, WELCOME_FMT.pack(WELCOME, self.arena.net_ids[id(client.player)],
+                                            self.arena.level_index, FPS, self.snapshot_every))
+
+    def _input(self, data, addr):
+        client = self.clients.get(addr)
+        if client is None:
+            return
+        _, seq, ack, mask = INPUT_FMT.unpack(data)
+        client.bytes_in += len(data)
+        client.last_seen = time.monotonic()
+        # Пакеты могут прийти не по порядку — старый ввод не перетирает новый
+        if seq > client.input_seq:
+            client.input_seq = seq
+            self.arena.set_inputs(client.player.id, decode_inputs(mask))
+        if ack > client.ack and ack in client.history:
+            client.ack = ack
+            for tick in [t for t in client.history if t < ack]:
+                del client.history[tick]
+
+    def _send(self, client, data):
+        client.bytes_out += len(data)
+        self.transport.sendto(data, client.addr)
+
+    def drop(self, addr, reason):
+        client = self.clients.pop(addr)
+        self.arena.remove_player(client.player.id)
+        self.log(f"{addr[0]}:{addr[1]} {reason} (player {client.player.id}, {len(self.clients)} online)")
+
+    def tick(self):
+        start = time.perf_counter()
+        self.arena.step()
+        if self.arena.frame % self.snapshot_every == 0:
+            self.send_snapshots()
+            now = time.monotonic()
+            for addr in [a for a, c in self.clients.items() if now - c.last_seen > CLIENT_TIMEOUT]:
+                self.drop(addr, "timed out")
+        self.tick_times.append(time.perf_counter() - start)
+
+    def send_snapshots(self):
+        tick = self.arena.frame
+        for client in self.clients.values():
+            area = client.interest
+            # Как камера клиента: у края мира область сдвигается внутрь, а не обрезается
+            area.center = client.player.rect.center
+            area.clamp_ip(self.arena.area)
+            state = visible_state(self.arena, area, client.player)
+            baseline = client.history.get(client.ack) if self.delta else None
+            if baseline is None:
+                client.full_snapshots += 1
+                data = encode_snapshot(tick, state)
+            else:
+                data = encode_snapshot(tick, state, client.ack, baseline)
+            self._send(client, data)
+            client.snapshots += 1
+            client.history[tick] = state
+            if len(client.history) > HISTORY:
+                del client.history[next(iter(client.history))]
+
+    async def run(self, duration=None):
+        # Фиксированный шаг по часам цикла событий; между тиками обрабатываются пакеты
+        loop = asyncio.get_running_loop()
+        interval = 1 / FPS
+        next_tick = loop.time()
+        end = None if duration is None else next_tick + duration
+        self.running = True
+        while self.running and (end is None or loop.time() < end):
+            self.tick()
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < -MAX_LAG_TICKS * interval:
+                self.late_ticks += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(max(0.0, delay))
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        # Время тика и трафик на клиента с последнего reset_stats()
+        elapsed = time.perf_counter() - self.stats_since
+        times = sorted(self.tick_times)
+        clients = list(self.clients.values())
+        n = len(clients) or 1
+        snapshots = sum(c.snapshots for c in clients)
+        return {
+            "players": len(clients),
+            "ticks": len(times),
+            "tick_rate": len(times) / elapsed if elapsed else 0.0,
+            "tick_ms_mean": statistics.fmean(times) * 1000 if times else 0.0,
+            "tick_ms_p99": percentile(times, 99) * 1000,
+            "late_ticks": self.late_ticks,
+            "out_bytes_per_s": sum(c.bytes_out for c in clients) / n / elapsed if elapsed else 0.0,
+            "in_bytes_per_s": sum(c.bytes_in for c in clients) / n / elapsed if elapsed else 0.0,
+            "snapshot_bytes": sum(c.bytes_out for c in clients) / snapshots if snapshots else 0.0,
+            "full_snapshots": sum(c.full_snapshots for c in clients),
+        }
+
+
+async def start_server(arena, host="127.0.0.1", port=DEFAULT_PORT, **kwargs):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(
+        lambda: ArenaServer(arena, **kwargs), local_addr=(host, port))
+    return transport, server
+
+
+async def serve(args):
+    arena = Arena(level_index=args.level, seed=args.seed, enemies=args.enemies)
+    transport, server = await start_server(arena, args.host, args.port, snapshot_every=args.snapshot_every)
+    print(f"Arena on level {args.level} ({arena.width}x{arena.height}, {arena.enemy_target} enemies) "
+          f"listening on {args.host}:{transport.get_extra_info('sockname')[1]}")
+    asyncio.get_running_loop().create_task(server.run())
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            s = server.stats()
+            if s["players"]:
+                print(f"{s['players']} players: tick {s['tick_ms_mean']:.2f} ms (p99 {s['tick_ms_p99']:.2f}), "
+                      f"{s['tick_rate']:.0f} ticks/s, {s['out_bytes_per_s'] / 1024:.1f} KB/s out per client")
+            server.reset_stats()
+    finally:
+        server.stop()
+        transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a GooseTanks multiplayer arena server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--enemies", type=int, help="enemies kept alive in the arena (default: as in the level)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--snapshot-every", type=int, default=SNAPSHOT_EVERY, help="ticks between snapshots")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between status lines")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
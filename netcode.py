@@ -0,0 +1,124 @@
+import struct
+
+# Протокол сетевой игры (net_server.py / net_client.py) поверх UDP.
+# Клиент шлёт HELLO, пока не получит WELCOME, затем INPUT (маска ввода как
+# в записи партии + номер последнего полученного снимка). Сервер шлёт SNAPSHOT —
+# состояние видимых игроку сущностей, закодированное разницей с последним
+# снимком, который клиент подтвердил (baseline). Снимок без baseline — полный.
+PROTOCOL_VERSION = 1
+HELLO, WELCOME, INPUT, SNAPSHOT, BYE = range(1, 6)
+
+HELLO_FMT = struct.Struct("<BB")
+# тип, сетевой номер своего гуся, уровень, частота тиков, снимок раз в N тиков
+WELCOME_FMT = struct.Struct("<BIHBB")
+# тип, номер пакета ввода, подтверждённый тик снимка, маска Inputs
+INPUT_FMT = struct.Struct("<BIIB")
+BYE_FMT = struct.Struct("<B")
+# тип, тик, тик baseline (0 — полный снимок), изменённых, удалённых
+SNAPSHOT_HEADER = struct.Struct("<BIIHH")
+RECORD_HEADER = struct.Struct("<IB")
+
+# Сущность в снимке: (kind, x, y, extra)
+GOOSE, ENEMY, BULLET, BONUS = range(4)
+FACINGS = ("right", "left", "up", "down")
+
+# Биты маски записи: какие поля идут следом. MOVE — сдвиг на байт по x и y
+# относительно baseline вместо полных координат; так кодируется почти всё движение
+KIND, POS, MOVE, EXTRA = 1, 2, 4, 8
+FIELD_FORMATS = ((KIND, "B"), (POS, "hh"), (MOVE, "bb"), (EXTRA, "B"))
+FIELDS = [struct.Struct("<" + "".join(fmt for bit, fmt in FIELD_FORMATS if mask & bit)) for mask in range(16)]
+NEW_ENTITY = KIND | POS | EXTRA
+# POS — два int16, поэтому мир арены не больше MAX_COORD по каждой стороне (см. Arena)
+MAX_COORD = 32767
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def goose_extra(facing, health, invulnerable):
+    return FACINGS.index(facing) | min(health, 7) << 2 | (invulnerable > 0) << 5
+
+
+def unpack_goose_extra(extra):
+    # -> (facing, health, неуязвим)
+    return FACINGS[extra & 3], extra >> 2 & 7, bool(extra & 32)
+
+
+def encode_snapshot(tick, state, baseline_tick=0, baseline=None):
+    # state и baseline — {net_id: (kind, x, y, extra)}
+    baseline = baseline or {}
+    records = []
+    for net_id, entity in state.items():
+        old = baseline.get(net_id)
+        if old is None:
+            mask, values = NEW_ENTITY, entity
+        elif old == entity:
+            continue
+        else:
+            kind, x, y, extra = entity
+            mask, values = 0, []
+            if kind != old[0]:
+                mask |= KIND
+                values.append(kind)
+            dx, dy = x - old[1], y - old[2]
+            if dx or dy:
+                if -128 <= dx < 128 and -128 <= dy < 128:
+                    mask |= MOVE
+                    values += (dx, dy)
+                else:
+                    mask |= POS
+                    values += (x, y)
+            if extra != old[3]:
+                mask |= EXTRA
+                values.append(extra)
+        records.append(RECORD_HEADER.pack(net_id, mask))
+        records.append(FIELDS[mask].pack(*values))
+    removed = [net_id for net_id in baseline if net_id not in state]
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT, tick, baseline_tick, len(records) // 2, len(removed))
+    return b"".join([header, *records, struct.pack(f"<{len(removed)}I", *removed)])
+
+
+def decode_snapshot(data, baselines):
+    # baselines — {tick: state} уже принятых снимков; -> (tick, baseline_tick, state)
+    try:
+        kind, tick, baseline_tick, changed, removed = SNAPSHOT_HEADER.unpack_from(data)
+        if kind != SNAPSHOT:
+            raise ProtocolError(f"not a snapshot: packet type {kind}")
+        if baseline_tick:
+            baseline = baselines.get(baseline_tick)
+            if baseline is None:
+                raise ProtocolError(f"snapshot {tick}: baseline {baseline_tick} is unknown")
+            state = dict(baseline)
+        else:
+            state = {}
+        offset = SNAPSHOT_HEADER.size
+        for _ in range(changed):
+            net_id, mask = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            fields = FIELDS[mask]
+            values = iter(fields.unpack_from(data, offset))
+            offset += fields.size
+            if mask & POS and mask & MOVE:
+                raise ProtocolError(f"snapshot {tick}: entity {net_id} has both POS and MOVE")
+            old = state.get(net_id)
+            if old is None and mask != NEW_ENTITY:
+                raise ProtocolError(f"snapshot {tick}: delta for unknown entity {net_id}")
+            ekind, x, y, extra = old or (0, 0, 0, 0)
+            if mask & KIND:
+                ekind = next(values)
+            if mask & POS:
+                x, y = next(values), next(values)
+            if mask & MOVE:
+                x += next(values)
+                y += next(values)
+            if mask & EXTRA:
+                extra = next(values)
+            state[net_id] = (ekind, x, y, extra)
+        for net_id in struct.unpack_from(f"<{removed}I", data, offset):
+            state.pop(net_id, None)
+        if offset + 4 * removed != len(data):
+            raise ProtocolError(f"snapshot {tick}: {len(data) - offset - 4 * removed} trailing bytes")
+    except struct.error as e:
+        raise ProtocolError(f"truncated snapshot: {e}") from None
+    return tick, baseline_tick, state
@@ -0,0 +1,142 @@
+import csv
+import gc
+import json
+import time
+from array import array
+
+
+class StageTimer:
+    # Время по стадиям кадра: begin() в начале кадра, mark(name) после каждой стадии.
+    # Время между двумя mark() записывается на стадию, названную во втором.
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stages = {}
+        self._last = 0.0
+
+    def begin(self):
+        self.stages = {}
+        self._last = self.clock()
+
+    def mark(self, name):
+        now = self.clock()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last
+        self._last = now
+
+
+def percentile(values, p):
+    # Ближайший ранг, p — в процентах: наименьшее значение, не меньше которого p% всех.
+    # Одно определение для batch_sim.py, net_server.py и benchmarks/
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(0, -(-p * len(values) // 100) - 1)]
+
+
+STAGES = ("events", "movement", "bullets", "enemies", "bonuses", "draw")
+HISTORY = 300
+
+
+class FrameProfiler(StageTimer):
+    # Кольцевой буфер последних history кадров: время стадий, интервал между
+    # кадрами (вместе с ожиданием clock.tick), число сущностей и сборок мусора.
+    # Память под буфер выделяется один раз.
+    def __init__(self, history=HISTORY, clock=time.perf_counter):
+        super().__init__(clock)
+        self.history = history
+        self.frame_no = 0
+        self.index = -1
+        self.filled = 0
+        self.stage_ms = {stage: array("d", bytes(8 * history)) for stage in STAGES}
+        self.frame_ms = array("d", bytes(8 * history))
+        self.enemies = array("i", bytes(4 * history))
+        self.bullets = array("i", bytes(4 * history))
+        self.gc_count = array("i", bytes(4 * history))
+        self.gc_ms = array("d", bytes(8 * history))
+        self._frame_start = None
+        self._interval = 0.0
+        self._gc_start = 0.0
+        self._gc_count = 0
+        self._gc_time = 0.0
+        gc.callbacks.append(self._on_gc)
+
+    def close(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = self.clock()
+        else:
+            self._gc_count += 1
+            self._gc_time += self.clock() - self._gc_start
+
+    def begin(self):
+        now = self.clock()
+        self._interval = now - self._frame_start if self._frame_start is not None else 0.0
+        self._frame_start = now
+        super().begin()
+
+    def end_frame(self, world):
+        # Вызывать после отрисовки
+        i = self.index = (self.index + 1) % self.history
+        stages = self.stages
+        for stage in STAGES:
+            self.stage_ms[stage][i] = stages.get(stage, 0.0) * 1000
+        self.frame_ms[i] = self._interval * 1000
+        self.enemies[i] = world.enemy_count
+        self.bullets[i] = world.bullet_count
+        self.gc_count[i] = self._gc_count
+        self.gc_ms[i] = self._gc_time * 1000
+        self._gc_count = 0
+        self._gc_time = 0.0
+        self.filled = min(self.filled + 1, self.history)
+        self.frame_no += 1
+
+    def recent(self, n):
+        # Индексы последних n кадров, от старого к новому
+        n = min(n, self.filled)
+        return [(self.index - k) % self.history for k in range(n - 1, -1, -1)]
+
+    def fps(self):
+        idx = self.recent(60)
+        total = sum(self.frame_ms[i] for i in idx)
+        return 1000 * len(idx) / total if total else 0.0
+
+    def mean_ms(self, stage, n=60):
+        idx = self.recent(n)
+        if not idx:
+            return 0.0
+        return sum(self.stage_ms[stage][i] for i in idx) / len(idx)
+
+    def work_ms(self, i):
+        return sum(self.stage_ms[stage][i] for stage in STAGES)
+
+    def record(self, i=None):
+        i = self.index if i is None else i
+        row = {"frame": self.frame_no, "frame_ms": round(self.frame_ms[i], 4)}
+        for stage in STAGES:
+            row[stage + "_ms"] = round(self.stage_ms[stage][i], 4)
+        row.update(enemies=self.enemies[i], bullets=self.bullets[i],
+                   gc_count=self.gc_count[i], gc_ms=round(self.gc_ms[i], 4))
+        return row
+
+
+class TraceWriter:
+    # Построчная запись кадров профилировщика: .csv или .jsonl по расширению
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.endswith(".jsonl")
+        self._file = open(path, "w", newline="")
+        self._csv = None
+
+    def write(self, row):
+        if self.jsonl:
+            self._file.write(json.dumps(row) + "\n")
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(self._file, fieldnames=list(row))
+            self._csv.writeheader()
+        self._csv.writerow(row)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,43 @@
+import itertools
+
+
+class Pool:
+    # Живые объекты лежат в items[0:count], за ними — свободные, готовые к повторному
+    # использованию. Удаление ставит последний живой объект на место удалённого,
+    # а удалённый уходит в хвост: ничего не сдвигается и не создаётся заново.
+    # Порядок живых при этом меняется — так же меняет его EntityArrays.swap_remove.
+    def __init__(self, factory, capacity=0):
+        self.factory = factory
+        self.items = [factory() for _ in range(capacity)]
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return itertools.islice(self.items, self.count)
+
+    def acquire(self):
+        # Объект нужно заново инициализировать: в нём остались поля прошлой жизни
+        if self.count == len(self.items):
+            self.items.append(self.factory())
+        obj = self.items[self.count]
+        self.count += 1
+        return obj
+
+    def swap_remove(self, i):
+        items = self.items
+        last = self.count - 1
+        items[i], items[last] = items[last], items[i]
+        self.count = last
+
+    def remove_dead(self):
+        # Удаляет объекты с флагом dead, от конца к началу: тогда на место
+        # каждого удалённого встаёт живой объект с хвоста
+        items = self.items
+        for i in range(self.count - 1, -1, -1):
+            if items[i].dead:
+                self.swap_remove(i)
+
+    def clear(self):
+        self.count = 0
@@ -0,0 +1,208 @@
+import collections
+
+import pygame
+
+from perf import STAGES
+
+BACKGROUND_COLOR = (30, 30, 30)
+WALL_COLOR = (100, 100, 100)
+BONUS_COLORS = {"health": (200, 0, 0), "shield": (0, 100, 255), "speed": (255, 255, 0)}
+# Если грязных прямоугольников больше, дешевле обновить весь экран
+DIRTY_LIMIT = 200
+PERF_PANEL_SIZE = (230, 190)
+PERF_GRAPH_HEIGHT = 40
+FRAME_BUDGET_MS = 1000 / 60
+# Цифры в оверлее обновляются раз в столько кадров, чтобы их можно было прочитать
+PERF_TEXT_EVERY = 15
+# Стены карты рисуются кусками CHUNK_SIZE×CHUNK_SIZE по мере надобности;
+# в памяти держится не больше CHUNK_CACHE последних использованных кусков
+CHUNK_SIZE = 256
+CHUNK_CACHE = 64
+
+
+class TextCache:
+    # Отрендеренные надписи по ключу (текст, цвет); старые вытесняются
+    def __init__(self, font, limit=64):
+        self.font = font
+        self.limit = limit
+        self._surfaces = collections.OrderedDict()
+
+    def get(self, text, color):
+        key = (text, color)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = self.font.render(text, True, color)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.limit:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+
+class Renderer:
+    # Фон — видимая камерой часть карты, собранная из кусков со стенами.
+    # Пока камера стоит, каждый кадр под прошлыми спрайтами восстанавливается
+    # фон и на экран уходят только изменённые области; сдвинулась — фон
+    # собирается заново и обновляется весь экран. Рисуются только объекты,
+    # попадающие в камеру.
+    def __init__(self, surface, font, assets):
+        self.surface = surface
+        self.text = TextCache(font)
+        self.assets = assets
+        self.bonus_imgs = {}
+        for btype, color in BONUS_COLORS.items():
+            img = pygame.Surface((30, 30))
+            img.fill(color)
+            self.bonus_imgs[btype] = img
+        self.background = None
+        self._chunks = collections.OrderedDict()
+        self._camera_pos = None
+        self._level_version = None
+        self._drawn = []
+        self._perf_panel = None
+        self._perf_text = None
+        self._perf_lines = []
+        self._perf_frame = None
+
+    def resize(self, surface):
+        self.surface = surface
+        self.background = None
+        self.invalidate()
+
+    def invalidate(self):
+        self._camera_pos = None
+
+    def _chunk(self, world, cx, cy):
+        key = (cx, cy)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        area = pygame.Rect(cx * CHUNK_SIZE, cy * CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE)
+        chunk = pygame.Surface(area.size).convert()
+        chunk.fill(BACKGROUND_COLOR)
+        for wall in world.wall_grid.collide_list(area):
+            pygame.draw.rect(chunk, WALL_COLOR, wall.move(-area.x, -area.y))
+        self._chunks[key] = chunk
+        if len(self._chunks) > CHUNK_CACHE:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def _build_background(self, world):
+        if world.level_version != self._level_version:
+            self._chunks.clear()
+            self._level_version = world.level_version
+        width, height = self.surface.get_size()
+        if self.background is None:
+            self.background = pygame.Surface((width, height)).convert()
+        self.background.fill(BACKGROUND_COLOR)
+        camera = world.camera
+        x0, y0 = max(0, camera.x // CHUNK_SIZE), max(0, camera.y // CHUNK_SIZE)
+        x1 = min((world.width - 1) // CHUNK_SIZE, (camera.x + width - 1) // CHUNK_SIZE)
+        y1 = min((world.height - 1) // CHUNK_SIZE, (camera.y + height - 1) // CHUNK_SIZE)
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                self.background.blit(self._chunk(world, cx, cy),
+                                     (cx * CHUNK_SIZE - camera.x, cy * CHUNK_SIZE - camera.y))
+        self._camera_pos = camera.topleft
+
+    def draw(self, world, message=None, profiler=None):
+        win = self.surface
+        camera = world.camera
+        full = camera.topleft != self._camera_pos or world.level_version != self._level_version
+        if full:
+            self._build_background(world)
+            win.blit(self.background, (0, 0))
+        else:
+            for rect in self._drawn:
+                win.blit(self.background, rect, rect)
+
+        width, height = win.get_size()
+        ox, oy = camera.topleft
+        drawn = []
+        bullet_img = self.assets.sprite("bullet")
+        for rect in world.bullet_rects(camera):
+            drawn.append(win.blit(bullet_img, (rect.x - ox, rect.y - oy)))
+        enemy_img = self.assets.sprite("enemy")
+        for rect in world.enemy_rects(camera):
+            drawn.append(win.blit(enemy_img, (rect.x - ox, rect.y - oy)))
+        for bonus in world.bonuses:
+            if camera.colliderect(bonus.rect):
+                drawn.append(win.blit(self.bonus_imgs[bonus.type], (bonus.rect.x - ox, bonus.rect.y - oy)))
+        if not world.game_over:
+            for goose, facing in world.geese():
+                if camera.colliderect(goose):
+                    drawn.append(win.blit(self.assets.sprite("goose", facing), (goose.x - ox, goose.y - oy)))
+        else:
+            over_text = self.text.get("GAME OVER - Press R to restart", (255, 0, 0))
+            drawn.append(win.blit(over_text, (width // 2 - 140, height // 2)))
+        if world.level_completed:
+            completed_text = self.text.get("LEVEL COMPLETED! Press N for next level", (0, 255, 0))
+            drawn.append(win.blit(completed_text, (width // 2 - 180, height // 2 - 40)))
+
+        health_surface = self.text.get(f"Health: {world.health}", (255, 255, 255))
+        drawn.append(win.blit(health_surface, (width - 120, 10)))
+        if profiler is not None and profiler.filled:
+            drawn.append(self._draw_perf(profiler, width))
+        if message is not None:
+            text, color, offset = message
+            drawn.append(win.blit(self.text.get(text, color), (width // 2 + offset, height // 2)))
+
+        if full or len(self._drawn) + len(drawn) > DIRTY_LIMIT:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._drawn + drawn)
+        self._drawn = drawn
+
+    def _draw_perf(self, profiler, width):
+        # Оверлей под надписью здоровья: FPS, время по стадиям, GC и график кадров
+        if self._perf_panel is None:
+            self._perf_panel = pygame.Surface(PERF_PANEL_SIZE, pygame.SRCALPHA)
+            self._perf_text = TextCache(pygame.font.SysFont("Arial", 14), limit=256)
+        panel, text = self._perf_panel, self._perf_text
+        panel_w, panel_h = PERF_PANEL_SIZE
+        if self._perf_frame is None or profiler.frame_no - self._perf_frame >= PERF_TEXT_EVERY:
+            self._perf_frame = profiler.frame_no
+            i = profiler.index
+            idx = profiler.recent(60)
+            self._perf_lines = [
+                ("FPS", f"{profiler.fps():.0f}"),
+                ("enemies / bullets", f"{profiler.enemies[i]} / {profiler.bullets[i]}"),
+            ] + [(stage, f"{profiler.mean_ms(stage):.2f} ms") for stage in STAGES] + [
+                ("gc / s", f"{sum(profiler.gc_count[k] for k in idx)} "
+                           f"({sum(profiler.gc_ms[k] for k in idx):.1f} ms)"),
+            ]
+
+        panel.fill((0, 0, 0, 170))
+        white = (230, 230, 230)
+        for row, (label, value) in enumerate(self._perf_lines):
+            y = 4 + row * 14
+            panel.blit(text.get(label, white), (6, y))
+            value_surf = text.get(value, white)
+            panel.blit(value_surf, (panel_w - 6 - value_surf.get_width(), y))
+
+        # График: столбик на кадр — время работы; линия — бюджет кадра 60 FPS
+        bottom = panel_h - 4
+        scale = (PERF_GRAPH_HEIGHT - 10) / FRAME_BUDGET_MS
+        for x, i in enumerate(profiler.recent(panel_w - 12)):
+            work = profiler.work_ms(i)
+            bar = min(PERF_GRAPH_HEIGHT, max(1, int(work * scale)))
+            color = (80, 220, 80) if work <= FRAME_BUDGET_MS else (230, 70, 60)
+            pygame.draw.line(panel, color, (6 + x, bottom), (6 + x, bottom - bar))
+        budget_y = bottom - int(FRAME_BUDGET_MS * scale)
+        pygame.draw.line(panel, (255, 255, 0), (6, budget_y), (panel_w - 6, budget_y))
+        return self.surface.blit(panel, (width - panel_w - 10, 36))
+
+    def draw_menu(self, options, selected_idx):
+        win = self.surface
+        width, height = win.get_size()
+        win.fill((20, 20, 20))
+        for i, option in enumerate(options):
+            color = (255, 255, 255) if i == selected_idx else (150, 150, 150)
+            text_surf = self.text.get(option, color)
+            rect = text_surf.get_rect(center=(width // 2, height // 2 + i * 40))
+            win.blit(text_surf, rect)
+        pygame.display.update()
+        # После меню фон игры нужно нарисовать заново
+        self.invalidate()
@@ -0,0 +1,145 @@
+import argparse
+import struct
+import sys
+import time
+import zlib
+
+from world import Inputs, World
+
+# Запись партии (.gtr): заголовок с сидом и параметрами мира, затем сжатые zlib
+# ввод по кадрам (один байт — битовая маска Inputs), смены размера окна и
+# контрольные хэши состояния
+MAGIC = b"GTRP"
+VERSION = 4
+HEADER = struct.Struct("<4sHQiiiiiii")
+RESIZE = struct.Struct("<iii")
+CHECKPOINT = struct.Struct("<i8s")
+CHECKPOINT_INTERVAL = 60
+
+
+class ReplayError(Exception):
+    pass
+
+
+def encode_inputs(inputs):
+    mask = 0
+    for bit, pressed in enumerate(inputs):
+        if pressed:
+            mask |= 1 << bit
+    return mask
+
+
+def decode_inputs(mask):
+    return Inputs(*((mask >> bit) & 1 == 1 for bit in range(len(Inputs._fields))))
+
+
+class Recorder:
+    # Пишет ввод каждого шага мира и раз в interval шагов — хэш состояния.
+    # Вызывать step() вместо world.step(), resize() — вместо world.resize().
+    def __init__(self, world, interval=CHECKPOINT_INTERVAL):
+        self.world = world
+        self.interval = interval
+        self.level_index = world.level_index
+        # Размер окна (камеры), а не мира: мир задаёт уровень, а камера входит в state_hash
+        self.size = tuple(world.camera.size)
+        self.inputs = bytearray()
+        self.resizes = []
+        self.checkpoints = []
+
+    def step(self, inputs, timer=None):
+        self.inputs.append(encode_inputs(inputs))
+        self.world.step(inputs, timer)
+        if len(self.inputs) % self.interval == 0:
+            self.checkpoints.append((len(self.inputs), self.world.state_hash()))
+
+    def resize(self, width, height):
+        self.resizes.append((len(self.inputs), width, height))
+        self.world.resize(width, height)
+
+    def save(self, path):
+        world = self.world
+        header = HEADER.pack(MAGIC, VERSION, world.seed, self.level_index, self.size[0], self.size[1],
+                             self.interval, len(self.inputs), len(self.resizes), len(self.checkpoints))
+        body = bytearray(self.inputs)
+        for resize in self.resizes:
+            body += RESIZE.pack(*resize)
+        for frame, digest in self.checkpoints:
+            body += CHECKPOINT.pack(frame, digest)
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(zlib.compress(bytes(body), 9))
+
+
+class Recording:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ReplayError(f"{path}: truncated header")
+        (magic, version, self.seed, self.level_index, width, height, self.interval,
+         n_frames, n_resizes, n_checkpoints) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"{path}: unsupported format")
+        self.size = (width, height)
+        body = zlib.decompress(data[HEADER.size:])
+        if len(body) != n_frames + n_resizes * RESIZE.size + n_checkpoints * CHECKPOINT.size:
+            raise ReplayError(f"{path}: size mismatch")
+        self.inputs = body[:n_frames]
+        offset = n_frames
+        self.resizes = [RESIZE.unpack_from(body, offset + i * RESIZE.size) for i in range(n_resizes)]
+        offset += n_resizes * RESIZE.size
+        self.checkpoints = [CHECKPOINT.unpack_from(body, offset + i * CHECKPOINT.size)
+                            for i in range(n_checkpoints)]
+
+    def make_world(self, world_cls=World):
+        world = world_cls(self.size[0], self.size[1], self.level_index, seed=self.seed)
+        world.load_level(world.level_index)
+        return world
+
+
+def replay(recording, world_cls=World, verify=True):
+    # Прогоняет запись без окна так быстро, как получается.
+    # Возвращает (мир, номер кадра первого расхождения или None, секунды на шаги).
+    world = recording.make_world(world_cls)
+    decoded = [decode_inputs(mask) for mask in range(1 << len(Inputs._fields))]
+    resizes = iter(recording.resizes)
+    next_resize = next(resizes, None)
+    checkpoints = dict(recording.checkpoints) if verify else {}
+    elapsed = 0.0
+    for frame, mask in enumerate(recording.inputs):
+        while next_resize is not None and next_resize[0] == frame:
+            world.resize(next_resize[1], next_resize[2])
+            next_resize = next(resizes, None)
+        start = time.perf_counter()
+        world.step(decoded[mask])
+        elapsed += time.perf_counter() - start
+        expected = checkpoints.get(frame + 1)
+        if expected is not None and world.state_hash() != expected:
+            return world, frame + 1, elapsed
+    return world, None, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded GooseTanks session headless")
+    parser.add_argument("path")
+    parser.add_argument("--swarm", action="store_true", help="replay with the numpy SwarmWorld")
+    parser.add_argument("--no-verify", action="store_true", help="skip state hash checks")
+    args = parser.parse_args()
+
+    world_cls = World
+    if args.swarm:
+        from swarm import SwarmWorld
+        world_cls = SwarmWorld
+    recording = Recording(args.path)
+    world, mismatch, elapsed = replay(recording, world_cls, verify=not args.no_verify)
+    frames = len(recording.inputs)
+    print(f"{frames} steps in {elapsed:.3f}s ({frames / max(elapsed, 1e-9):.0f} steps/s), "
+          f"seed {recording.seed}, {len(recording.checkpoints)} checkpoints")
+    if mismatch is not None:
+        print(f"State mismatch at frame {mismatch}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+CELL_SIZE = 64
+
+
+class SpatialGrid:
+    # Равномерная сетка: каждая ячейка хранит объекты, чей rect её задевает.
+    # brute_force=True отключает сетку и проверяет все объекты подряд —
+    # нужно, чтобы сверять результаты обоих вариантов.
+    def __init__(self, cell_size=CELL_SIZE, brute_force=False):
+        self.cell_size = cell_size
+        self.brute_force = brute_force
+        self._cells = {}
+        self._items = {}
+        self._order = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        self._cells.clear()
+        self._items.clear()
+        self._order = 0
+
+    def _span(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, rect.top // cs,
+                (rect.right - 1) // cs, (rect.bottom - 1) // cs)
+
+    def _add_to_cells(self, entry, span):
+        x0, y0, x1, y1 = span
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                # Не setdefault: он создавал бы пустой список на каждый вызов
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cell = cells[(cx, cy)] = []
+                cell.append(entry)
+
+    def _remove_from_cells(self, entry, span):
+        # Опустевшие ячейки не удаляем: враги ходят туда-обратно,
+        # и список ячейки пришлось бы каждый раз создавать заново
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self._cells[(cx, cy)].remove(entry)
+
+    def insert(self, item, rect):
+        # rect хранится по ссылке: у движущихся объектов он меняется на месте,
+        # после перемещения нужно вызвать move()
+        span = self._span(rect)
+        entry = [self._order, item, rect, span]
+        self._order += 1
+        self._items[id(item)] = entry
+        if not self.brute_force:
+            self._add_to_cells(entry, span)
+
+    def remove(self, item):
+        entry = self._items.pop(id(item), None)
+        if entry is not None and not self.brute_force:
+            self._remove_from_cells(entry, entry[3])
+
+    def move(self, item):
+        entry = self._items[id(item)]
+        span = self._span(entry[2])
+        if span == entry[3]:
+            return
+        if not self.brute_force:
+            self._remove_from_cells(entry, entry[3])
+            self._add_to_cells(entry, span)
+        entry[3] = span
+
+    def _candidates(self, rect):
+        # Без повторов, но с новым словарём на запрос — только для collide_list,
+        # который всё равно создаёт список; collide_any и collide_first обходят ячейки сами
+        if self.brute_force:
+            return self._items.values()
+        x0, y0, x1, y1 = self._span(rect)
+        cells = self._cells
+        if x0 == x1 and y0 == y1:
+            return cells.get((x0, y0), ())
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for entry in cells.get((cx, cy), ()):
+                    found[entry[0]] = entry
+        return found.values()
+
+    def collide_any(self, rect):
+        if self.brute_force:
+            for entry in self._items.values():
+                if rect.colliderect(entry[2]):
+                    return True
+            return False
+        x0, y0, x1, y1 = self._span(rect)
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for entry in cells.get((cx, cy), ()):
+                    if rect.colliderect(entry[2]):
+                        return True
+        return False
+
+    def collide_list(self, rect):
+        # В порядке вставки — так же, как при переборе исходного списка
+        hits = [entry for entry in self._candidates(rect) if rect.colliderect(entry[2])]
+        hits.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in hits]
+
+    def collide_first(self, rect):
+        # Повторы из соседних ячеек не мешают: ищется просто самый ранний
+        first = None
+        if self.brute_force:
+            for entry in self._items.values():
+                if rect.colliderect(entry[2]) and (first is None or entry[0] < first[0]):
+                    first = entry
+            return first[1] if first is not None else None
+        x0, y0, x1, y1 = self._span(rect)
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for entry in cells.get((cx, cy), ()):
+                    if rect.colliderect(entry[2]) and (first is None or entry[0] < first[0]):
+                        first = entry
+        return first[1] if first is not None else None
@@ -0,0 +1,342 @@
+import pygame
+
+from navigation import VISION_RANGE
+from world import BULLET_SIZE, CHASE_MEMORY, ENEMY_SIZE, FAR_TICK, World
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для роевых уровней
+    np = None
+
+PATROLLING, CHASING = 0, 1
+STATE_NAMES = ("patrolling", "chasing")
+
+ENEMY_FIELDS = {"x": "int32", "y": "int32", "speed": "int32", "direction": "int32",
+                "state": "int8", "alert": "int32", "patrol_lo": "int32", "patrol_hi": "int32",
+                "order": "int32"}
+BULLET_FIELDS = {"x": "int32", "y": "int32", "vx": "int32", "vy": "int32"}
+
+
+class EntityArrays:
+    # Структура массивов: по массиву на поле, живые сущности лежат в [0, count).
+    # Все сущности одного хранилища одного размера (w, h).
+    def __init__(self, size, fields, capacity=64):
+        self.w, self.h = size
+        self.count = 0
+        self._data = {name: np.zeros(capacity, dtype) for name, dtype in fields.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        # Представление без копии: изменения пишутся прямо в хранилище
+        return self._data[name][:self.count]
+
+    def _reserve(self, extra):
+        capacity = len(self._data["x"])
+        needed = self.count + extra
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, arr in self._data.items():
+            grown = np.zeros(capacity, arr.dtype)
+            grown[:self.count] = arr[:self.count]
+            self._data[name] = grown
+
+    def add(self, **values):
+        self._reserve(1)
+        i = self.count
+        for name, value in values.items():
+            self._data[name][i] = value
+        self.count += 1
+        return i
+
+    def add_many(self, **columns):
+        n = len(next(iter(columns.values())))
+        self._reserve(n)
+        for name, column in columns.items():
+            self._data[name][self.count:self.count + n] = column
+        self.count += n
+
+    def swap_remove(self, dead):
+        # Удаляет как Pool.remove_dead в World: от конца к началу, на место
+        # удалённого встаёт последний. j-й с конца удалённый d[j] получает то,
+        # что к этому моменту лежит в позиции count - 1 - j; если эта позиция сама
+        # была удалённой и уже заполнена, идём по цепочке дальше. Цепочки короткие,
+        # так что это несколько векторных шагов вместо цикла по индексам.
+        dead = np.unique(dead)[::-1]
+        last = self.count - len(dead)
+        tail = np.arange(self.count - 1, last - 1, -1)
+        moved = dead < last
+        holes, src = dead[moved], tail[moved]
+        if len(holes):
+            nxt = np.arange(self.count)
+            nxt[dead] = tail
+            is_dead = np.zeros(self.count, dtype=bool)
+            is_dead[dead] = True
+            pending = is_dead[src]
+            while pending.any():
+                src[pending] = nxt[src[pending]]
+                pending = is_dead[src]
+            for arr in self._data.values():
+                arr[holes] = arr[src]
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+
+
+class WallMask:
+    # Стены на сжатой сетке: границы ячеек — только координаты краёв стен.
+    # По таблице префиксных сумм проверка «задевает ли прямоугольник стену»
+    # стоит два searchsorted на ось, сколько бы стен ни было.
+    def __init__(self, walls):
+        walls = np.array([tuple(w) for w in walls], dtype=np.int64).reshape(-1, 4)
+        left, top = walls[:, 0], walls[:, 1]
+        right, bottom = left + walls[:, 2], top + walls[:, 3]
+        self.xs = np.unique(np.concatenate([left, right]))
+        self.ys = np.unique(np.concatenate([top, bottom]))
+        covered = np.zeros((len(self.ys) + 1, len(self.xs) + 1), dtype=np.int32)
+        # Ячейка k по оси лежит в [xs[k - 1], xs[k]); нулевая и последняя — за краями
+        for x0, y0, x1, y1 in zip(np.searchsorted(self.xs, left) + 1, np.searchsorted(self.ys, top) + 1,
+                                  np.searchsorted(self.xs, right) + 1, np.searchsorted(self.ys, bottom) + 1):
+            covered[y0:y1, x0:x1] = 1
+        self.sums = np.zeros((covered.shape[0] + 1, covered.shape[1] + 1), dtype=np.int32)
+        self.sums[1:, 1:] = covered.cumsum(axis=0).cumsum(axis=1)
+
+    def hit(self, x, y, w, h):
+        # Для каждого прямоугольника (x, y, w, h): задевает ли он хоть одну стену
+        if not len(self.xs):
+            return np.zeros(len(x), dtype=bool)
+        x0 = np.searchsorted(self.xs, x, "right")
+        x1 = np.searchsorted(self.xs, x + w, "left") + 1
+        y0 = np.searchsorted(self.ys, y, "right")
+        y1 = np.searchsorted(self.ys, y + h, "left") + 1
+        s = self.sums
+        return (s[y1, x1] - s[y0, x1] - s[y1, x0] + s[y0, x0]) > 0
+
+
+def overlap_pairs(ax, ay, aw, ah, bx, by, bw, bh):
+    # Все пары (i, j), где a[i] пересекается с b[j]. b раскладываются по ячейкам
+    # размером не меньше aw + bw, поэтому каждое a проверяет не больше 2×2 ячеек.
+    empty = np.zeros(0, dtype=np.intp)
+    if not len(ax) or not len(bx):
+        return empty, empty
+    ax = ax.astype(np.int64)
+    ay = ay.astype(np.int64)
+    bx = bx.astype(np.int64)
+    by = by.astype(np.int64)
+    cs = max(aw + bw, ah + bh)
+    lo_x, hi_x = (ax - bw + 1) // cs, (ax + aw - 1) // cs
+    lo_y, hi_y = (ay - bh + 1) // cs, (ay + ah - 1) // cs
+    bcx, bcy = bx // cs, by // cs
+    ox, oy = min(lo_x.min(), bcx.min()), min(lo_y.min(), bcy.min())
+    cols = max(hi_x.max(), bcx.max()) - ox + 1
+
+    order = np.argsort((bcy - oy) * cols + (bcx - ox), kind="stable")
+    keys = ((bcy - oy) * cols + (bcx - ox))[order]
+    index = np.arange(len(ax))
+    found_i, found_j = [], []
+    for ddx in (0, 1):
+        for ddy in (0, 1):
+            cx, cy = lo_x + ddx, lo_y + ddy
+            key = (cy - oy) * cols + (cx - ox)
+            start = np.searchsorted(keys, key, "left")
+            counts = np.searchsorted(keys, key, "right") - start
+            counts[(cx > hi_x) | (cy > hi_y)] = 0
+            total = int(counts.sum())
+            if not total:
+                continue
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            found_i.append(np.repeat(index, counts))
+            found_j.append(order[np.repeat(start, counts) + offsets])
+    if not found_i:
+        return empty, empty
+    i = np.concatenate(found_i)
+    j = np.concatenate(found_j)
+    exact = ((ax[i] < bx[j] + bw) & (ax[i] + aw > bx[j])
+             & (ay[i] < by[j] + bh) & (ay[i] + ah > by[j]))
+    return i[exact], j[exact]
+
+
+def first_hits(i, j, rank):
+    # Как в покадровом цикле: пули по порядку, каждая забирает первого
+    # (с наименьшим rank) ещё живого врага из тех, с кем пересекается
+    if not len(i):
+        return i, j
+    order = np.lexsort((rank[j], i))
+    i, j = i[order], j[order]
+    first = np.ones(len(i), dtype=bool)
+    first[1:] = i[1:] != i[:-1]
+    if len(np.unique(j[first])) == np.count_nonzero(first):
+        return i[first], j[first]
+    # Редкий случай: несколько пуль в одного врага — разбираем по очереди
+    taken = set()
+    hit_i, hit_j = [], []
+    resolved = -1
+    for a, b in zip(i.tolist(), j.tolist()):
+        if a == resolved or b in taken:
+            continue
+        taken.add(b)
+        hit_i.append(a)
+        hit_j.append(b)
+        resolved = a
+    return np.array(hit_i, dtype=np.intp), np.array(hit_j, dtype=np.intp)
+
+
+def move_rects(x, y, w, h, dx, dy, walls, bounds):
+    # Сдвиг по каждой оси с откатом при столкновении со стеной, затем clamp_ip
+    x += dx
+    hit = walls.hit(x, y, w, h)
+    x[hit] -= dx[hit]
+    y += dy
+    hit = walls.hit(x, y, w, h)
+    y[hit] -= dy[hit]
+    left, top, width, height = bounds
+    np.clip(x, left, left + width - w, out=x)
+    np.clip(y, top, top + height - h, out=y)
+
+
+class SwarmWorld(World):
+    # Те же правила, что у World, но враги и пули лежат в массивах numpy
+    # и обновляются пакетно — для уровней с тысячами сущностей.
+    def __init__(self, *args, **kwargs):
+        if np is None:
+            raise ImportError("SwarmWorld requires numpy")
+        super().__init__(*args, **kwargs)
+        self.enemy_arrays = EntityArrays(ENEMY_SIZE, ENEMY_FIELDS)
+        self.bullet_arrays = EntityArrays(BULLET_SIZE, BULLET_FIELDS)
+        self.wall_mask = WallMask([])
+
+    def set_walls(self, walls, nav=None):
+        super().set_walls(walls, nav)
+        self.wall_mask = WallMask(walls)
+
+    def clear_enemies(self):
+        self.enemy_arrays.clear()
+        self.enemy_order = 0
+
+    def add_enemy(self, x, y):
+        patrol_range = self.rng.randint(100, 200)
+        i = self.enemy_arrays.add(
+            x=x, y=y, speed=2, direction=1, state=PATROLLING, alert=0,
+            patrol_lo=x, patrol_hi=min(x + patrol_range, self.width - ENEMY_SIZE[0] - 20),
+            order=self.enemy_order)
+        self.enemy_order += 1
+        return i
+
+    def add_bullet(self, x, y, vx, vy):
+        w, h = BULLET_SIZE
+        self.bullet_arrays.add(x=x - w // 2, y=y - h // 2, vx=vx, vy=vy)
+
+    @property
+    def enemy_count(self):
+        return self.enemy_arrays.count
+
+    @property
+    def bullet_count(self):
+        return self.bullet_arrays.count
+
+    def enemy_rects(self, area=None):
+        return self._rects(self.enemy_arrays, area)
+
+    def bullet_rects(self, area=None):
+        return self._rects(self.bullet_arrays, area)
+
+    def _rects(self, store, area):
+        x, y = store["x"], store["y"]
+        if area is not None:
+            inside = (x < area.right) & (x + store.w > area.left) & (y < area.bottom) & (y + store.h > area.top)
+            x, y = x[inside], y[inside]
+        return (pygame.Rect(x, y, store.w, store.h) for x, y in zip(x.tolist(), y.tolist()))
+
+    def reset(self):
+        super().reset()
+        self.bullet_arrays.clear()
+
+    def handle_bullets(self):
+        b = self.bullet_arrays
+        if not b.count:
+            return
+        x, y = b["x"], b["y"]
+        x += b["vx"]
+        y += b["vy"]
+        keep = (x <= self.width) & (x >= 0) & (y <= self.height) & (y >= 0)
+        keep &= ~self.wall_mask.hit(x, y, b.w, b.h)
+
+        e = self.enemy_arrays
+        hit_e = None
+        flying = np.flatnonzero(keep)
+        if len(flying) and e.count:
+            i, j = overlap_pairs(x[flying], y[flying], b.w, b.h, e["x"], e["y"], e.w, e.h)
+            hit_b, hit_e = first_hits(flying[i], j, e["order"])
+            keep[hit_b] = False
+        if not keep.all():
+            b.swap_remove(np.flatnonzero(~keep))
+        if hit_e is not None and len(hit_e):
+            self.kills += len(hit_e)
+            e.swap_remove(hit_e)
+
+    def _see_goose(self, x, y, w, h):
+        # Дальность проверяем пакетно, луч по сетке пускаем только для тех, кто рядом
+        g = self.goose_rect
+        gx, gy = g.center
+        ex, ey = x + w // 2, y + h // 2
+        sees = (ex - gx) ** 2 + (ey - gy) ** 2 <= VISION_RANGE * VISION_RANGE
+        for k in np.flatnonzero(sees).tolist():
+            sees[k] = self.nav.line_of_sight(int(ex[k]), int(ey[k]), gx, gy)
+        return sees
+
+    def _steer(self, x, y, speed):
+        # То же, что FlowField.steer, но для всех преследователей сразу
+        nav, g = self.nav, self.goose_rect
+        next_cell = np.frombuffer(self.flow.arrays(), dtype=np.int32)
+        cx = (x + nav.cell // 2) // nav.cell
+        cy = (y + nav.cell // 2) // nav.cell
+        inside = (cx >= 0) & (cx < nav.cols) & (cy >= 0) & (cy < nav.rows)
+        n = np.full(len(x), -1, dtype=np.int32)
+        n[inside] = next_cell[(cy * nav.cols + cx)[inside]]
+        tx = np.where(n >= 0, n % nav.cols * nav.cell, g.x)
+        ty = np.where(n >= 0, n // nav.cols * nav.cell, g.y)
+        return np.clip(tx - x, -speed, speed), np.clip(ty - y, -speed, speed)
+
+    def update_enemies(self):
+        e = self.enemy_arrays
+        g = self.goose_rect
+        self.flow.track(g)
+        if e.count:
+            x, y = e["x"], e["y"]
+            # Далёкие от камеры обновляются раз в FAR_TICK шагов, как в World.update_enemies
+            a = self.active_area
+            near = (x < a.right) & (x + e.w > a.left) & (y < a.bottom) & (y + e.h > a.top)
+            active = near | ((e["order"] + self.frame) % FAR_TICK == 0)
+            scale = np.where(near, 1, FAR_TICK)
+            sees = self._see_goose(x, y, e.w, e.h) & active
+            alert = e["alert"]
+            alert[sees] = CHASE_MEMORY
+            fading = active & ~sees & (alert > 0)
+            alert[fading] = np.maximum(alert[fading] - scale[fading], 0)
+            chasing = alert > 0
+            e["state"][active] = np.where(chasing, CHASING, PATROLLING)[active]
+            speed = e["speed"] * scale
+            chase_dx, chase_dy = self._steer(x, y, speed)
+            dx = np.where(active, np.where(chasing, chase_dx, speed * e["direction"]), 0)
+            dy = np.where(active & chasing, chase_dy, 0)
+            b = self.bounds
+            move_rects(x, y, e.w, e.h, dx, dy, self.wall_mask, (b.x, b.y, b.w, b.h))
+            direction = e["direction"]
+            patrolling = active & ~chasing
+            direction[patrolling & (x < e["patrol_lo"])] = 1
+            direction[patrolling & (x > e["patrol_hi"])] = -1
+
+            touching = ((x < g.right) & (x + e.w > g.left) & (y < g.bottom) & (y + e.h > g.top))
+            if not self.game_over and self.invulnerable == 0 and touching.any():
+                self.health -= 1
+                self.damage_taken += 1
+                self.invulnerable = 60
+                if self.health <= 0:
+                    self.game_over = True
+
+        if e.count == 0 and not self.level_completed:
+            self.level_completed = True
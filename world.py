@@ -0,0 +1,473 @@
+import collections
+import hashlib
+import itertools
+import os
+import random
+import struct
+
+import pygame
+
+import levels
+from levels import BONUS_TYPES
+from navigation import FlowField, NavGrid
+from pool import Pool
+from spatial import SpatialGrid
+
+FPS = 60
+STEP_MS = 1000 / FPS
+
+# GOOSE_BRUTE_FORCE=1 — проверять коллизии полным перебором вместо сетки
+USE_SPATIAL_GRID = os.environ.get("GOOSE_BRUTE_FORCE") != "1"
+
+GOOSE_SIZE = (40, 40)
+ENEMY_SIZE = (40, 40)
+BULLET_SIZE = (10, 5)
+BONUS_SIZE = (30, 30)
+# Сколько шагов враг продолжает погоню после того, как потерял гуся из виду
+CHASE_MEMORY = 120
+# Враги дальше FAR_MARGIN px от края камеры обновляются раз в FAR_TICK шагов,
+# но сразу на FAR_TICK шагов вперёд — средняя скорость та же, работы вчетверо меньше
+FAR_MARGIN = 200
+FAR_TICK = 4
+
+# Ввод за один шаг симуляции. restart/next_level — одноразовые команды (R и N)
+Inputs = collections.namedtuple(
+    "Inputs", ["left", "right", "up", "down", "fire", "restart", "next_level"],
+    defaults=(False,) * 7)
+NO_INPUT = Inputs()
+
+BULLET_VELOCITY = {"right": (10, 0), "left": (-10, 0), "up": (0, -10), "down": (0, 10)}
+# Номера версий стен общие для всех миров: один рендер может рисовать разные миры
+# (frame_bench.py, сетевой клиент), и у двух миров версии не должны совпасть
+_level_versions = itertools.count(1)
+
+
+class Enemy:
+    # Враги живут в пуле (World.enemies) и переиспользуются: spawn() заново
+    # расставляет все поля, rect и маршрут патруля остаются теми же объектами
+    __slots__ = ("world", "rect", "speed", "state", "alert", "patrol_points", "direction", "dead", "order")
+
+    def __init__(self, world):
+        self.world = world
+        self.rect = pygame.Rect((0, 0), ENEMY_SIZE)
+        self.patrol_points = [0, 0]
+
+    def spawn(self, x, y):
+        world = self.world
+        self.rect.topleft = (x, y)
+        self.speed = 2
+        self.state = "patrolling"
+        self.alert = 0
+        patrol_range = world.rng.randint(100, 200)
+        self.patrol_points[0] = x
+        self.patrol_points[1] = min(x + patrol_range, world.width - self.rect.width - 20)
+        self.direction = 1
+        self.dead = False
+        return self
+
+    def update(self, scale=1, target=None, flow=None):
+        # scale > 1 — редкое обновление далёкого врага сразу за несколько шагов;
+        # target и flow — за кем и по какому полю гнаться (на арене у каждого гуся
+        # своё поле), по умолчанию гусь мира и его поле
+        speed = self.speed * scale
+        if self.state == "patrolling":
+            self._move(speed * self.direction, 0)
+            # Разворачиваемся к маршруту, а не просто меняем направление —
+            # иначе враг, вернувшийся с погони, дёргается на месте
+            if self.rect.x < self.patrol_points[0]:
+                self.direction = 1
+            elif self.rect.x > self.patrol_points[1]:
+                self.direction = -1
+        elif self.state == "chasing":
+            if target is None:
+                target, flow = self.world.goose_rect, self.world.flow
+            self._move(*flow.steer(self.rect, speed, target))
+
+    def _move(self, dx, dy):
+        world = self.world
+        # По X
+        self.rect.x += dx
+        if world.wall_grid.collide_any(self.rect):
+            self.rect.x -= dx
+
+        # По Y
+        self.rect.y += dy
+        if world.wall_grid.collide_any(self.rect):
+            self.rect.y -= dy
+
+        # Границы мира
+        self.rect.clamp_ip(world.bounds)
+        world.enemy_grid.move(self)
+
+    def can_see_goose(self):
+        return self.world.nav.can_see(self.rect, self.world.goose_rect)
+
+
+class Bullet:
+    __slots__ = ("rect", "vx", "vy", "dead")
+
+    def __init__(self):
+        self.rect = pygame.Rect((0, 0), BULLET_SIZE)
+
+    def spawn(self, x, y, vx, vy):
+        self.rect.center = (x, y)
+        self.vx = vx
+        self.vy = vy
+        self.dead = False
+        return self
+
+    def update(self):
+        self.rect.x += self.vx
+        self.rect.y += self.vy
+
+
+class Bonus:
+    def __init__(self, x, y, btype):
+        self.rect = pygame.Rect((x, y), BONUS_SIZE)
+        self.type = btype
+
+
+class World:
+    # Всё состояние игры. Ничего не рисует и не трогает дисплей,
+    # поэтому работает и без окна; время идёт фиксированными шагами step().
+    # width/height — размер мира (его задаёт уровень), camera — видимая часть
+    # размером с окно; в конструктор передаётся размер окна.
+    def __init__(self, width=800, height=600, level_index=1, seed=None,
+                 brute_force=not USE_SPATIAL_GRID):
+        self.width = width
+        self.height = height
+        self.area = pygame.Rect(0, 0, width, height)
+        self.bounds = pygame.Rect(20, 20, width - 40, height - 40)
+        self.camera = pygame.Rect(0, 0, width, height)
+        self.active_area = self.camera.inflate(2 * FAR_MARGIN, 2 * FAR_MARGIN)
+        self.level_index = level_index
+        # Вся случайность мира — только из этого генератора, чтобы партию можно было повторить
+        if seed is None:
+            seed = random.randrange(1 << 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.level_cache = levels.cache
+
+        self.goose_rect = pygame.Rect((50, 50), GOOSE_SIZE)
+        # Пули и враги берутся из пулов: в установившейся игре за кадр не создаётся ни одного объекта
+        self.bullets = Pool(Bullet)
+        self.walls = []
+        self.enemies = Pool(lambda: Enemy(self))
+        self.bonuses = []
+        self.wall_grid = SpatialGrid(brute_force=brute_force)
+        self.enemy_grid = SpatialGrid(brute_force=brute_force)
+        # Порядковый номер врага с последней очистки — как порядок вставки в enemy_grid
+        self.enemy_order = 0
+        self.nav = NavGrid([], width, height)
+        self.flow = FlowField(self.nav)
+
+        self.health = 3
+        self.invulnerable = 0
+        self.fire_cooldown = 0
+        self.speed_boost = 0
+        self.game_over = False
+        self.level_completed = False
+        self.facing = "right"
+        self.frame = 0
+        # Счётчики для статистики (batch_sim.py); копятся за всю жизнь мира, reset() их не трогает
+        self.shots = 0
+        self.kills = 0
+        self.damage_taken = 0
+        self.bonuses_taken = dict.fromkeys(BONUS_TYPES, 0)
+        # Меняется при каждой смене стен — по нему рендер понимает, что фон устарел
+        self.level_version = 0
+
+    @property
+    def time_ms(self):
+        # Игровое время считается по шагам, а не по настенным часам
+        return self.frame * 1000 // FPS
+
+    def load_level(self, idx):
+        # Уровни берутся из кэша (levels.cache): с диска читаются только при изменении,
+        # а следующий уровень подгружается заранее в фоне
+        level = self.level_cache.get(idx)
+        if level is None:
+            print(f"Level {idx} not found. Game completed.")
+            return False
+
+        self.set_size(level.width, level.height)
+        self.set_walls([pygame.Rect(w) for w in level.walls], level.nav_grid(self.width, self.height))
+        self.clear_enemies()
+        for x, y in level.enemies:
+            self.add_enemy(x, y)
+        self.bonuses.clear()
+        for bx, by, btype in level.bonuses:
+            self.bonuses.append(Bonus(bx, by, BONUS_TYPES[btype]))
+        self.update_camera()
+        self.level_cache.prefetch(idx + 1)
+        return True
+
+    def set_size(self, width, height):
+        self.width, self.height = width, height
+        self.area.size = (width, height)
+        self.bounds.size = (width - 40, height - 40)
+
+    def update_camera(self):
+        # Камера держит гуся в центре, но не выходит за край мира;
+        # если мир меньше окна, clamp_ip ставит его посередине
+        camera = self.camera
+        camera.center = self.goose_rect.center
+        camera.clamp_ip(self.area)
+        self.active_area.center = camera.center
+
+    def set_walls(self, walls, nav=None):
+        self.walls = walls
+        self.level_version = next(_level_versions)
+        self.nav = nav or NavGrid(walls, self.width, self.height, ENEMY_SIZE)
+        self.flow = FlowField(self.nav)
+        self.wall_grid.clear()
+        for w in walls:
+            self.wall_grid.insert(w, w)
+
+    def clear_enemies(self):
+        self.enemies.clear()
+        self.enemy_grid.clear()
+        self.enemy_order = 0
+
+    def add_enemy(self, x, y):
+        enemy = self.enemies.acquire().spawn(x, y)
+        enemy.order = self.enemy_order
+        self.enemy_order += 1
+        self.enemy_grid.insert(enemy, enemy.rect)
+        return enemy
+
+    def add_bullet(self, x, y, vx, vy):
+        return self.bullets.acquire().spawn(x, y, vx, vy)
+
+    @property
+    def enemy_count(self):
+        return len(self.enemies)
+
+    @property
+    def bullet_count(self):
+        return len(self.bullets)
+
+    def enemy_rects(self, area=None):
+        # С area — только задевающие её (рендер берёт так видимую часть карты)
+        if area is None:
+            return (enemy.rect for enemy in self.enemies)
+        return (enemy.rect for enemy in self.enemy_grid.collide_list(area))
+
+    def geese(self):
+        # (rect, facing) каждого гуся для рендера; у арены их несколько
+        return ((self.goose_rect, self.facing),)
+
+    def bullet_rects(self, area=None):
+        if area is None:
+            return (bullet.rect for bullet in self.bullets)
+        return (bullet.rect for bullet in self.bullets if area.colliderect(bullet.rect))
+
+    def spawn_enemies(self, n):
+        result = []
+        attempts = 0
+        inset = 60
+        while len(result) < n and attempts < 200:
+            x = self.rng.randint(inset, self.width - inset - 40)
+            y = self.rng.randint(inset, self.height - inset - 40)
+            r = pygame.Rect(x, y, 40, 40)
+            if r.colliderect(self.goose_rect):
+                attempts += 1
+                continue
+            if self.wall_grid.collide_any(r):
+                attempts += 1
+                continue
+            # Через пул и enemy_grid, как все враги мира
+            result.append(self.add_enemy(x, y))
+            attempts += 1
+        return result
+
+    def state_hash(self):
+        # Отпечаток состояния для сверки записи и повтора; одинаков для World и SwarmWorld
+        h = hashlib.blake2b(digest_size=8)
+        h.update(struct.pack(
+            "<14i", self.frame, self.level_index, self.width, self.height, *self.camera.size, *self.goose_rect,
+            self.health, self.invulnerable, self.fire_cooldown, self.speed_boost))
+        h.update(struct.pack("<2?", self.game_over, self.level_completed))
+        h.update(self.facing.encode())
+        for rects in (self.enemy_rects(), self.bullet_rects()):
+            flat = [v for rect in rects for v in rect]
+            h.update(struct.pack(f"<i{len(flat)}i", len(flat), *flat))
+        for bonus in self.bonuses:
+            h.update(struct.pack("<2i", *bonus.rect.topleft))
+            h.update(bonus.type.encode())
+        return h.digest()
+
+    def resize(self, width, height):
+        # Окно меняет только камеру: границы мира задаёт уровень
+        self.camera.size = (width, height)
+        self.active_area.size = (width + 2 * FAR_MARGIN, height + 2 * FAR_MARGIN)
+        self.update_camera()
+
+    def reset(self):
+        self.goose_rect.topleft = (50, 50)
+        self.bullets.clear()
+        self.health = 3
+        self.invulnerable = 0
+        self.game_over = False
+        self.level_completed = False
+        self.speed_boost = 0
+        self.load_level(self.level_index)
+        self.bonuses.clear()
+
+    def step(self, inputs=NO_INPUT, timer=None):
+        # timer (perf.StageTimer) — необязательный замер времени по стадиям шага
+        self.frame += 1
+        self.fire_cooldown += 1
+        if self.invulnerable > 0:
+            self.invulnerable -= 1
+        if self.speed_boost > 0:
+            self.speed_boost -= 1
+
+        if inputs.restart and self.game_over:
+            self.reset()
+        elif inputs.next_level and self.level_completed:
+            self.level_index += 1
+            self.reset()
+
+        if self.game_over or self.level_completed:
+            return
+        self.handle_movement(inputs)
+        self.update_camera()
+        if inputs.fire:
+            self.shoot()
+        if timer is not None:
+            timer.mark("movement")
+        self.handle_bullets()
+        if timer is not None:
+            timer.mark("bullets")
+        self.update_enemies()
+        if timer is not None:
+            timer.mark("enemies")
+        self.update_bonuses()
+        if timer is not None:
+            timer.mark("bonuses")
+
+    def handle_movement(self, inputs):
+        self.facing = self.move_goose(self.goose_rect, inputs, self.speed_boost, self.facing)
+
+    def move_goose(self, goose_rect, inputs, speed_boost, facing):
+        # Возвращает новое направление; общий для World и арены с несколькими гусями
+        speed = 7 if speed_boost > 0 else 4
+        orig_x, orig_y = goose_rect.x, goose_rect.y
+        if inputs.left:
+            goose_rect.x -= speed
+            facing = "left"
+        if inputs.right:
+            goose_rect.x += speed
+            facing = "right"
+        if inputs.up:
+            goose_rect.y -= speed
+            facing = "up"
+        if inputs.down:
+            goose_rect.y += speed
+            facing = "down"
+
+        # Ограничения по миру
+        goose_rect.x = max(20, min(goose_rect.x, self.width - goose_rect.width - 20))
+        goose_rect.y = max(20, min(goose_rect.y, self.height - goose_rect.height - 20))
+
+        # Проверка коллизий со стенами
+        if self.wall_grid.collide_any(goose_rect):
+            goose_rect.x, goose_rect.y = orig_x, orig_y
+        return facing
+
+    def handle_bullets(self):
+        # Сначала только помечаем убитых, а удаляем после цикла — порядок пуль
+        # и врагов в кадре не зависит от того, кто сколько раз был переставлен
+        width, height = self.width, self.height
+        wall_grid, enemy_grid = self.wall_grid, self.enemy_grid
+        removed = killed = 0
+        for b in self.bullets:
+            b.update()
+            rect = b.rect
+            if (rect.x > width or rect.x < 0 or rect.y > height or rect.y < 0
+                    or wall_grid.collide_any(rect)):
+                b.dead = True
+                removed += 1
+                continue
+            enemy = enemy_grid.collide_first(rect)
+            if enemy is not None:
+                # Убираем из сетки сразу, чтобы следующая пуля в него уже не попала
+                enemy_grid.remove(enemy)
+                enemy.dead = True
+                b.dead = True
+                self.bullet_hit(b, enemy)
+                removed += 1
+                killed += 1
+        if removed:
+            self.bullets.remove_dead()
+        if killed:
+            self.kills += killed
+            self.enemies.remove_dead()
+
+    def bullet_hit(self, bullet, enemy):
+        # Для арены: там очки за попадание достаются хозяину пули
+        pass
+
+    def update_enemies(self):
+        self.flow.track(self.goose_rect)
+        active, frame = self.active_area, self.frame
+        for enemy in self.enemies:
+            scale = 1
+            if not active.colliderect(enemy.rect):
+                # Далеко от камеры: свой шаг раз в FAR_TICK, номера вразнобой, чтобы не все в один кадр
+                if (enemy.order + frame) % FAR_TICK:
+                    continue
+                scale = FAR_TICK
+            if enemy.can_see_goose():
+                enemy.alert = CHASE_MEMORY
+            elif enemy.alert > 0:
+                enemy.alert = max(0, enemy.alert - scale)
+            enemy.state = "chasing" if enemy.alert > 0 else "patrolling"
+            enemy.update(scale)
+
+            if not self.game_over and enemy.rect.colliderect(self.goose_rect) and self.invulnerable == 0:
+                self.health -= 1
+                self.damage_taken += 1
+                self.invulnerable = 60
+                if self.health <= 0:
+                    self.game_over = True
+
+        if len(self.enemies) == 0 and not self.level_completed:
+            self.level_completed = True
+
+    def update_bonuses(self):
+        # Проверка бонусов (с конца, чтобы удалять прямо на ходу)
+        bonuses = self.bonuses
+        for i in range(len(bonuses) - 1, -1, -1):
+            bonus = bonuses[i]
+            if self.goose_rect.colliderect(bonus.rect):
+                self.apply_bonus(self, bonus.type)
+                del bonuses[i]
+        self.spawn_bonus()
+
+    def apply_bonus(self, goose, btype):
+        # goose — сам мир или игрок арены: у обоих health, invulnerable и speed_boost
+        self.bonuses_taken[btype] += 1
+        if btype == "health":
+            if goose.health < 5:
+                goose.health += 1
+        elif btype == "shield":
+            goose.invulnerable = 180
+        elif btype == "speed":
+            goose.speed_boost = 180
+
+    def spawn_bonus(self):
+        # Спавн бонусов (примерно раз в 7 секунд игрового времени)
+        if self.time_ms % 7000 < 60 and len(self.bonuses) < 2:
+            bx, by = self.rng.randint(50, self.width - 80), self.rng.randint(50, self.height - 80)
+            if not self.wall_grid.collide_any(pygame.Rect((bx, by), BONUS_SIZE)):
+                self.bonuses.append(Bonus(bx, by, self.rng.choice(BONUS_TYPES)))
+
+    def shoot(self):
+        if self.fire_cooldown < 20:
+            return
+        vx, vy = BULLET_VELOCITY.get(self.facing, (10, 0))
+        self.add_bullet(self.goose_rect.centerx, self.goose_rect.centery, vx, vy)
+        self.fire_cooldown = 0
+        self.shots += 1